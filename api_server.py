@@ -0,0 +1,397 @@
+"""
+🎰 Локальный HTTP API только для чтения: живые рейтинги для дашбордов и оверлеев
+
+Ответы строятся прямо из памяти TournamentManager и кэшируются по версии чата
+(история - по версии истории, которую меняет только завершение турнира):
+пока счет не изменился, повторный запрос отдает готовые байты, а запрос
+с If-None-Match - пустой 304. Поток /api/events (server-sent events) присылает
+изменения счета без опроса.
+
+Эндпоинты (game - эмодзи или название игры, по умолчанию 🎰):
+    GET /api/tournaments[?chat_id=]
+    GET /api/chats/<chat_id>/leaderboard[?game=&page=]
+    GET /api/chats/<chat_id>/users/<user_id>[?game=]
+    GET /api/history[?chat_id=&limit=&offset=]
+    GET /api/events[?chat_id=]
+
+Включается переменной API_PORT, по умолчанию слушает только 127.0.0.1.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Hashable, Optional, Set, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from database import TournamentManager
+from utils.scoring import DEFAULT_GAME, parse_game
+
+logger = logging.getLogger(__name__)
+
+STATUS_TEXT = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+# Сколько событий может ждать медленный клиент потока, прежде чем его отключат
+EVENT_QUEUE_SIZE = 256
+# Комментарий-пинг в потоке событий, чтобы прокси не закрывали соединение
+EVENT_PING_INTERVAL = 15
+# Сколько ждать следующего запроса в keep-alive соединении
+IDLE_TIMEOUT = 30
+
+CHAT_ROUTE = re.compile(r"^/api/chats/(-?\d+)/(leaderboard|users/(\d+))$")
+
+class ApiError(Exception):
+    """Ошибка запроса с HTTP-статусом"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+def dump_json(data) -> bytes:
+    return json.dumps(data, default=_json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _int_arg(query: Dict[str, list], name: str, default: Optional[int] = None) -> Optional[int]:
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+
+def _game_arg(query: Dict[str, list]) -> str:
+    values = query.get('game')
+    if not values:
+        return DEFAULT_GAME
+    game = parse_game(values[0])
+    if game is None:
+        raise ApiError(400, "unknown game")
+    return game
+
+class _Subscriber:
+    """Клиент потока событий"""
+    __slots__ = ('queue', 'chat_id')
+
+    def __init__(self, chat_id: Optional[int]):
+        self.queue: asyncio.Queue = asyncio.Queue(EVENT_QUEUE_SIZE)
+        self.chat_id = chat_id
+
+class ApiServer:
+    """HTTP-сервер на asyncio.start_server поверх одного TournamentManager"""
+
+    def __init__(self, manager: TournamentManager, host: str = "127.0.0.1", port: int = 8080,
+                 page_size: int = 50, max_cached: int = 1024):
+        self.manager = manager
+        self.host = host
+        self.port = port
+        self.page_size = page_size
+        self.max_cached = max_cached
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._subscribers: Set[_Subscriber] = set()
+        # Ключ ответа -> (версия, тело, ETag)
+        self._cache: 'OrderedDict[Hashable, Tuple[int, bytes, str]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # ========== ЖИЗНЕННЫЙ ЦИКЛ ==========
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # port=0 - свободный порт от системы
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.manager.add_listener(self._on_event)
+        logger.info(f"🌐 HTTP API: http://{self.host}:{self.port}/api/tournaments")
+
+    async def stop(self):
+        self.manager.remove_listener(self._on_event)
+        # Будим потоки событий, чтобы они закрыли соединения
+        for subscriber in list(self._subscribers):
+            self._drop(subscriber)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    # ========== МАРШРУТЫ ==========
+
+    def _route(self, path: str, query: Dict[str, list]) -> Tuple[Hashable, int, Callable[[], object]]:
+        """Возвращает (ключ кэша, версия данных, построение ответа)"""
+        manager = self.manager
+
+        if path == "/api/tournaments":
+            chat_id = _int_arg(query, 'chat_id')
+            if chat_id is not None:
+                # Чтение через API возвращает выгруженный чат, но не продлевает ему жизнь
+                manager.ensure_chat(chat_id, touch=False)
+            return ('tournaments', chat_id), manager.version, lambda: self._tournaments(chat_id)
+
+        if path == "/api/history":
+            chat_id = _int_arg(query, 'chat_id')
+            limit = min(max(_int_arg(query, 'limit', 20), 1), 100)
+            offset = max(_int_arg(query, 'offset', 0), 0)
+            return (
+                ('history', chat_id, limit, offset), manager.history_version,
+                lambda: self._history(chat_id, limit, offset)
+            )
+
+        match = CHAT_ROUTE.match(path)
+        if match:
+            chat_id = int(match.group(1))
+            game = _game_arg(query)
+            manager.ensure_chat(chat_id, touch=False)
+            version = manager.chat_versions.get(chat_id, 0)
+            if match.group(3) is None:
+                page = max(_int_arg(query, 'page', 0), 0)
+                return ('leaderboard', chat_id, game, page), version, lambda: self._leaderboard(chat_id, game, page)
+            user_id = int(match.group(3))
+            return ('user', chat_id, game, user_id), version, lambda: self._user(chat_id, game, user_id)
+
+        raise ApiError(404, "not found")
+
+    def _tournaments(self, chat_id: Optional[int]):
+        tournaments = self.manager.get_all_active_tournaments()
+        if chat_id is not None:
+            tournaments = [t for t in tournaments if t['chat_id'] == chat_id]
+        return {
+            'tournaments': [
+                dict(t, players=len(self.manager.player_stats.get((t['chat_id'], t['game']), ())))
+                for t in tournaments
+            ]
+        }
+
+    def _leaderboard(self, chat_id: int, game: str, page: int):
+        tournament = self.manager.get_tournament_info(chat_id, game)
+        if tournament is None:
+            raise ApiError(404, "no active tournament")
+
+        rows = self.manager.get_stats(chat_id, game)
+        pages = max(1, -(-len(rows) // self.page_size))
+        start = page * self.page_size
+        names = self.manager.player_names
+        return {
+            'tournament': tournament,
+            'page': page,
+            'pages': pages,
+            'total_players': len(rows),
+            'rows': [
+                {'place': place, 'user_id': user_id, 'name': names.get(user_id), 'score': score}
+                for place, (user_id, score) in enumerate(rows[start:start + self.page_size], start + 1)
+            ]
+        }
+
+    def _user(self, chat_id: int, game: str, user_id: int):
+        manager = self.manager
+        current = None
+        stats = manager.player_stats.get((chat_id, game))
+        if stats is not None and user_id in stats:
+            # Место без сортировки: считаем игроков с большим счетом
+            score = stats[user_id]
+            current = {'score': score, 'rank': 1 + sum(1 for other in stats.values() if other > score)}
+
+        return {
+            'user_id': user_id,
+            'name': manager.player_names.get(user_id),
+            'game': game,
+            'tournament': current,
+            'lifetime': manager.get_lifetime_stats(user_id, chat_id, game),
+            'lifetime_rank': manager.get_lifetime_rank(user_id, chat_id, game=game)
+        }
+
+    def _history(self, chat_id: Optional[int], limit: int, offset: int):
+        history = self.manager.tournament_history
+        if chat_id is not None:
+            history = [r for r in history if r['tournament_data'].get('chat_id') == chat_id]
+        selected = history[::-1][offset:offset + limit]
+        names = self.manager.player_names
+        return {
+            'total': len(history),
+            'tournaments': [
+                {
+                    'tournament': results['tournament_data'],
+                    'total_wins': results['total_wins'],
+                    'total_players': results['total_players'],
+                    'top': [
+                        {'user_id': int(user_id), 'name': names.get(int(user_id)), 'score': score}
+                        for user_id, score in list(results['player_stats'].items())[:10]
+                    ]
+                }
+                for results in selected
+            ]
+        }
+
+    def _cached(self, key: Hashable, version: int, build: Callable[[], object]) -> Tuple[bytes, str]:
+        """Тело и ETag ответа; сериализация только при смене версии данных"""
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return entry[1], entry[2]
+
+        self.misses += 1
+        body = dump_json(build())
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        self._cache[key] = (version, body, etag)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return body, etag
+
+    # ========== ПОТОК СОБЫТИЙ ==========
+
+    def _on_event(self, event: Dict):
+        """Сериализует событие один раз и раздает всем подходящим подписчикам"""
+        if not self._subscribers:
+            return
+        payload = f"event: {event['type']}\ndata: ".encode() + dump_json(event) + b"\n\n"
+        for subscriber in list(self._subscribers):
+            if subscriber.chat_id is not None and subscriber.chat_id != event['chat_id']:
+                continue
+            try:
+                subscriber.queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # Клиент не успевает читать - отключаем, а не копим память
+                self._drop(subscriber)
+
+    def _drop(self, subscriber: _Subscriber):
+        self._subscribers.discard(subscriber)
+        try:
+            subscriber.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    async def _stream_events(self, writer: asyncio.StreamWriter, query: Dict[str, list]):
+        subscriber = _Subscriber(_int_arg(query, 'chat_id'))
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream; charset=utf-8\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Access-Control-Allow-Origin: *\r\n"
+            b"Connection: close\r\n\r\n"
+            b"retry: 3000\n\n"
+        )
+        await writer.drain()
+
+        self._subscribers.add(subscriber)
+        try:
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscriber.queue.get(), EVENT_PING_INTERVAL)
+                except asyncio.TimeoutError:
+                    payload = b": ping\n\n"
+                if payload is None or subscriber not in self._subscribers:
+                    break
+                writer.write(payload)
+                await writer.drain()
+        finally:
+            self._subscribers.discard(subscriber)
+
+    # ========== HTTP ==========
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                    break
+
+                request_line, *header_lines = head.decode('latin-1').split("\r\n")
+                try:
+                    method, target, _ = request_line.split(" ", 2)
+                except ValueError:
+                    await self._send(writer, 400, dump_json({'error': "bad request"}), keep_alive=False)
+                    break
+
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                url = urlsplit(target)
+                path = unquote(url.path).rstrip("/") or "/"
+                query = parse_qs(url.query)
+
+                if method not in ("GET", "HEAD"):
+                    await self._send(writer, 405, dump_json({'error': "read-only API"}), keep_alive=keep_alive)
+                elif path == "/api/events":
+                    try:
+                        await self._stream_events(writer, query)
+                    except ApiError as e:
+                        await self._send(writer, e.status, dump_json({'error': str(e)}), keep_alive=False)
+                    break
+                else:
+                    await self._respond(writer, method, path, query, headers, keep_alive)
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, ApiError):
+            pass
+        except Exception as e:
+            logger.error(f"Ошибка HTTP API: {e}")
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, method: str, path: str,
+                       query: Dict[str, list], headers: Dict[str, str], keep_alive: bool):
+        try:
+            key, version, build = self._route(path, query)
+            body, etag = self._cached(key, version, build)
+        except ApiError as e:
+            await self._send(writer, e.status, dump_json({'error': str(e)}), keep_alive=keep_alive)
+            return
+
+        if etag in headers.get('if-none-match', ''):
+            await self._send(writer, 304, b"", etag=etag, keep_alive=keep_alive)
+        else:
+            await self._send(writer, 200, body, etag=etag, keep_alive=keep_alive, head_only=method == "HEAD")
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, body: bytes, etag: Optional[str] = None,
+                    keep_alive: bool = True, head_only: bool = False):
+        lines = [
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+            f"Content-Length: {len(body) if status != 304 else 0}",
+            "Cache-Control: no-cache",
+            "Access-Control-Allow-Origin: *",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status != 304:
+            lines.append("Content-Type: application/json; charset=utf-8")
+        if etag:
+            lines.append(f"ETag: {etag}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+        if body and status != 304 and not head_only:
+            writer.write(body)
+        await writer.drain()
+
+async def start_api(application, port: Optional[int] = None):
+    """post_init: поднимает HTTP API рядом с ботом (в мультибот-режиме - на порту бота)"""
+    from config import config
+    from database import get_tournament_manager
+
+    server = ApiServer(
+        get_tournament_manager(application), config.API_HOST, port or config.API_PORT,
+        page_size=config.API_PAGE_SIZE
+    )
+    await server.start()
+    application.bot_data['api_server'] = server
+
+async def stop_api(application):
+    """post_shutdown: останавливает HTTP API"""
+    server = application.bot_data.pop('api_server', None)
+    if server is not None:
+        await server.stop()
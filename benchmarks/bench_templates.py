@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Замер стоимости рендера рейтинга на 10 000 строк
+Запуск: python benchmarks/bench_templates.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import templates
+
+ROWS = 10_000
+REPEAT = 20
+
+def make_leaderboard(rows: int, seed: int = 777):
+    """Создает отсортированный рейтинг и словарь имен"""
+    rng = random.Random(seed)
+    stats = {100000 + i: rng.randint(1, 500) for i in range(rows)}
+    names = {user_id: f"Игрок <{user_id}> & Co" for user_id in stats}
+    return sorted(stats.items(), key=lambda x: x[1], reverse=True), names
+
+def render_concat(rows, names) -> str:
+    """Старый способ: f-строки и += в цикле, экранирование на каждом вызове"""
+    import html
+    text = templates.STATS_HEADER + "\n"
+    for i, (user_id, wins) in enumerate(rows, 1):
+        text += f"{i}. {html.escape(names[user_id])}: {wins} 🎰\n"
+    return text
+
+def render_join(rows, names):
+    """Новый способ: строки рейтинга одним join и разбиение по 4096"""
+    return templates.render_leaderboard(rows, names, header=templates.STATS_HEADER.format(emoji="🎰"), medals=False)
+
+def main():
+    rows, names = make_leaderboard(ROWS)
+    render_join(rows, names)  # прогрев кэша экранирования
+
+    concat = min(timeit.repeat(lambda: render_concat(rows, names), number=1, repeat=REPEAT))
+    join = min(timeit.repeat(lambda: render_join(rows, names), number=1, repeat=REPEAT))
+    chunks = render_join(rows, names)
+
+    print(f"Строк: {ROWS}, лучший из {REPEAT} прогонов")
+    print(f"f-строки + '+=':        {concat * 1000:8.2f} мс")
+    print(f"шаблоны + join + чанки: {join * 1000:8.2f} мс")
+    print(f"Сообщений после разбиения: {len(chunks)}, "
+          f"максимум {max(len(c.encode('utf-16-le')) // 2 for c in chunks)} символов")
+
+if __name__ == '__main__':
+    main()
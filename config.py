@@ -1,48 +1,95 @@
 import os
-import sys
 from typing import Optional
 
 class Config:
-    """Класс для управления конфигурацией бота"""
+    """Класс для управления конфигурацией бота
+
+    При импорте только читает окружение; проверка и сообщения об ошибках -
+    в validate(), которую вызывает запуск бота.
+    """
     
     def __init__(self):
+        # Файл со списком ботов для мультибот-режима (токены берутся из него)
+        self.BOTS_FILE = os.getenv('BOTS_FILE', '')
+        
         # Получаем токен бота из переменных окружения
-        self.BOT_TOKEN = self._get_env_var('BOT_TOKEN')
+        self.BOT_TOKEN = self._get_env_var('BOT_TOKEN', '')
         
         # ID администратора
         self.ADMIN_ID = int(self._get_env_var('ADMIN_ID', '0'))
 
-        self.BOT_ACTIVE = True
+        # Включен ли бот в чатах без своей настройки (/active и /inactive меняют по чатам)
+        self.DEFAULT_CHAT_ACTIVE = os.getenv('DEFAULT_CHAT_ACTIVE', '1').lower() not in ('0', 'false', 'off', 'no')
         
         # Настройки турнира
         self.MAX_TOURNAMENT_DURATION = 1440  # Максимум 24 часа в минутах
         self.MESSAGE_AGE_LIMIT = 120  # 2 минуты в секундах
         
+        # Резервная копия турниров: читается при запуске, пишется раз в EVICT_INTERVAL и при остановке
+        self.STATE_FILE = os.getenv('STATE_FILE', 'tournaments_backup.json')
+        
+        # Файл настроек чатов (перечитывается по SIGHUP)
+        self.CHAT_SETTINGS_FILE = os.getenv('CHAT_SETTINGS_FILE', 'chat_settings.json')
+        
+        # Сколько секунд хранить список администраторов чата
+        self.ADMIN_CACHE_TTL = float(os.getenv('ADMIN_CACHE_TTL', '600'))
+        
+        # Флуд-контроль бросков: токенов в секунду, запас, окно предупреждения и время жизни
+        self.FLOOD_RATE = float(os.getenv('FLOOD_RATE', '0.5'))
+        self.FLOOD_BURST = int(os.getenv('FLOOD_BURST', '5'))
+        self.FLOOD_WARN_WINDOW = float(os.getenv('FLOOD_WARN_WINDOW', '60'))
+        self.FLOOD_IDLE_TTL = float(os.getenv('FLOOD_IDLE_TTL', '600'))
+        
+        # Настройки HTTP-клиента для исходящих вызовов Bot API
+        self.HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '32'))
+        self.HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+        self.HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+        self.HTTP_WRITE_TIMEOUT = float(os.getenv('HTTP_WRITE_TIMEOUT', '10'))
+        self.HTTP_POOL_TIMEOUT = float(os.getenv('HTTP_POOL_TIMEOUT', '3'))
+        self.HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+        self.HTTP_VERSION = os.getenv('HTTP_VERSION', '1.1')  # '1.1' или '2' (нужен пакет h2)
+        
+        # Отдельный пул для get_updates, чтобы long polling не занимал соединения ответов
+        self.UPDATES_POOL_SIZE = int(os.getenv('UPDATES_POOL_SIZE', '1'))
+        self.UPDATES_READ_TIMEOUT = float(os.getenv('UPDATES_READ_TIMEOUT', '10'))
+        self.UPDATES_POOL_TIMEOUT = float(os.getenv('UPDATES_POOL_TIMEOUT', '5'))
+        
+        # Количество процессов-воркеров (1 - обычный однопроцессный режим)
+        self.SHARD_WORKERS = int(os.getenv('SHARD_WORKERS', '1'))
+        
+        # Локальный HTTP API для дашбордов и оверлеев (0 - выключен)
+        self.API_PORT = int(os.getenv('API_PORT', '0'))
+        self.API_HOST = os.getenv('API_HOST', '127.0.0.1')
+        self.API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '50'))
+        
+        # Выгрузка состояния чатов без обновлений на диск (CHAT_IDLE_TTL=0 - выключена).
+        # С тем же периодом пишется резервная копия STATE_FILE
+        self.OFFLOAD_DIR = os.getenv('OFFLOAD_DIR', 'offload')
+        self.CHAT_IDLE_TTL = int(os.getenv('CHAT_IDLE_TTL', '259200'))
+        self.EVICT_INTERVAL = int(os.getenv('EVICT_INTERVAL', '600'))
+        
         # Настройки логирования
         self.LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
         self.LOG_FILE = 'bot.log'
-        
-        # Проверяем обязательные переменные
-        self._validate_config()
     
     def _get_env_var(self, var_name: str, default: Optional[str] = None) -> str:
-        """Получает переменную окружения с проверкой"""
-        value = os.getenv(var_name, default)
-        
-        if var_name == 'BOT_TOKEN' and (not value or value == 'YOUR_BOT_TOKEN_HERE'):
-            print(f"❌ ОШИБКА: {var_name} не установлен!")
+        """Получает переменную окружения"""
+        return os.getenv(var_name, default)
+    
+    def validate(self) -> bool:
+        """Проверяет конфигурацию; False - запуск невозможен"""
+        # В мультибот-режиме токены берутся из файла ботов
+        if not self.BOTS_FILE and (not self.BOT_TOKEN or self.BOT_TOKEN == 'YOUR_BOT_TOKEN_HERE'):
+            print("❌ ОШИБКА: BOT_TOKEN не установлен!")
             print("Создайте бота через @BotFather и установите токен:")
             print("export BOT_TOKEN='ваш_токен_бота'")
-            sys.exit(1)
+            return False
         
-        return value
-    
-    def _validate_config(self):
-        """Проверяет конфигурацию"""
         if self.ADMIN_ID == 0:
             print("⚠️ ВНИМАНИЕ: ADMIN_ID не установлен. Админские функции отключены.")
             print("Получите ваш ID через @userinfobot и установите:")
             print("export ADMIN_ID='ваш_id'")
+        return True
 
 # Создаем глобальный объект конфигурации
 config = Config()
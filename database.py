@@ -1,27 +1,111 @@
 import json
+import heapq
+import os
+import time
 from datetime import datetime, timedelta
 from collections import defaultdict
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Callable, Dict, List, Set, Tuple, Optional, Any
 import threading
+from array import array
+
+from utils.memory import deep_sizeof
+from utils.scoring import DEFAULT_GAME, GAMES
+
+# Количество значений 🎰 (64 - это 777)
+SLOT_VALUES = 64
+
+# Ключ турнира: в одном чате может идти по турниру на каждую игру
+TournamentKey = Tuple[int, str]
+
+def datetime_serializer(obj):
+    """Конвертирует datetime в строки для JSON"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+def parse_datetimes(tournament: Dict) -> Dict:
+    """Возвращает start_time/end_time турнира из строк JSON в datetime"""
+    for field in ('start_time', 'end_time'):
+        if isinstance(tournament.get(field), str):
+            tournament[field] = datetime.fromisoformat(tournament[field])
+    return tournament
 
 class TournamentManager:
     """Управление турнирами и статистикой"""
     
-    def __init__(self):
-        self.active_tournaments: Dict[int, Dict] = {}
-        self.player_stats: Dict[int, Dict[int, int]] = {}
+    def __init__(self, namespace: str = ""):
+        self.namespace = namespace  # имя бота в мультибот-режиме
+        self.active_tournaments: Dict[TournamentKey, Dict] = {}
+        self.player_stats: Dict[TournamentKey, Dict[int, int]] = {}
+        self._active_ids: Dict[int, TournamentKey] = {}  # tournament_id -> (chat_id, игра)
         self.lock = threading.Lock()  # Для потокобезопасности
         
         # История турниров (можно сохранять в файл)
         self.tournament_history: List[Dict] = []
+        self.tournament_results: Dict[int, Dict] = {}  # tournament_id -> результаты из истории
+        self._next_tournament_id = 1
+        
+        # Накопительная статистика за все время по каждой игре: по чатам и глобальная
+        self.chat_lifetime: Dict[TournamentKey, Dict[int, Dict[str, int]]] = {}
+        self.global_lifetime: Dict[str, Dict[int, Dict[str, int]]] = {}
+        self.player_names: Dict[int, str] = {}
+        self._top_cache: Dict[Tuple[Optional[int], str, str, int], List[Tuple[int, Dict[str, int]]]] = {}
+        
+        # Гистограммы всех бросков 🎰: 64 счетчика на игрока и на чат
+        self.user_rolls: Dict[int, array] = {}
+        self.chat_rolls: Dict[int, array] = {}
+        
+        # Версии состояния для кэшей ответов: общая и по каждому чату
+        self.version = 0
+        self.chat_versions: Dict[int, int] = {}
+        # Версия истории: меняется только при завершении турнира, а не на каждом броске
+        self.history_version = 0
+        # Подписчики на изменения турниров (HTTP API, поток событий)
+        self._listeners: List[Callable[[Dict], None]] = []
+        
+        # Выгрузка неактивных чатов: последнее обновление чата и выгруженные на диск
+        self.offload_dir: Optional[str] = None
+        self.chat_last_seen: Dict[int, float] = {}
+        self._offloaded: Set[int] = set()
+        self._stale_offloads: Set[int] = set()  # вернулись в память, файл ждет резервной копии
+        self.evicted = 0
+        self.rehydrated = 0
+    
+    def add_listener(self, callback: Callable[[Dict], None]):
+        """Подписывает callback на события start/score/stop (вызывается в потоке изменения)"""
+        self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[Dict], None]):
+        """Отписывает callback от событий"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    def _emit(self, event: Dict):
+        """Рассылает событие подписчикам (вызывается вне lock)"""
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Ошибка подписчика событий: {e}")
     
-    def start_tournament(self, chat_id: int, chat_title: str, duration_minutes: Optional[int] = None) -> bool:
-        """Запускает турнир в чате"""
+    def _touch(self, chat_id: int):
+        """Отмечает изменение состояния чата (вызывается под lock)"""
+        self.version += 1
+        self.chat_versions[chat_id] = self.chat_versions.get(chat_id, 0) + 1
+    
+    def start_tournament(self, chat_id: int, chat_title: str, duration_minutes: Optional[int] = None,
+                         game: str = DEFAULT_GAME) -> bool:
+        """Запускает турнир по игре в чате"""
+        key = (chat_id, game)
         with self.lock:
-            if chat_id in self.active_tournaments and self.active_tournaments[chat_id]['is_active']:
+            if key in self.active_tournaments and self.active_tournaments[key]['is_active']:
                 return False  # Турнир уже активен
             
-            self.active_tournaments[chat_id] = {
+            self.active_tournaments[key] = {
+                'tournament_id': self._next_tournament_id,
+                'version': 0,  # растет при каждом изменении счета
+                'chat_id': chat_id,
+                'game': game,
                 'start_time': datetime.now(),
                 'end_time': datetime.now() + timedelta(minutes=duration_minutes) if duration_minutes else None,
                 'chat_title': chat_title,
@@ -30,24 +114,32 @@ class TournamentManager:
                 'message_count': 0
             }
             
-            # Инициализируем статистику
-            self.player_stats[chat_id] = defaultdict(int)
+            self._active_ids[self._next_tournament_id] = key
+            self._next_tournament_id += 1
             
-            return True
+            # Инициализируем статистику
+            self.player_stats[key] = defaultdict(int)
+            self._touch(chat_id)
+            tournament_id = self._next_tournament_id - 1
+        
+        if self._listeners:
+            self._emit({'type': 'start', 'chat_id': chat_id, 'game': game, 'tournament_id': tournament_id})
+        return True
     
-    def stop_tournament(self, chat_id: int) -> Optional[Dict]:
+    def stop_tournament(self, chat_id: int, game: str = DEFAULT_GAME) -> Optional[Dict]:
         """Останавливает турнир и возвращает результаты"""
+        key = (chat_id, game)
         with self.lock:
-            if chat_id not in self.active_tournaments:
+            if key not in self.active_tournaments:
                 return None
             
-            tournament = self.active_tournaments[chat_id].copy()
+            tournament = self.active_tournaments[key].copy()
             tournament['is_active'] = False
             tournament['end_time'] = datetime.now()
             
             # Получаем статистику
-            if chat_id in self.player_stats:
-                stats = self.player_stats[chat_id]
+            if key in self.player_stats:
+                stats = self.player_stats[key]
                 sorted_players = sorted(stats.items(), key=lambda x: x[1], reverse=True)
                 
                 results = {
@@ -59,63 +151,415 @@ class TournamentManager:
                 
                 # Сохраняем в историю
                 self.tournament_history.append(results)
+                self.tournament_results[tournament['tournament_id']] = results
+                self.history_version += 1
+                self._update_lifetime(chat_id, game, stats)
                 
                 # Очищаем активные данные
-                del self.active_tournaments[chat_id]
-                del self.player_stats[chat_id]
-                
-                return results
+                del self.active_tournaments[key]
+                del self.player_stats[key]
+                self._active_ids.pop(tournament['tournament_id'], None)
+                self._touch(chat_id)
+            else:
+                return None
+        
+        if self._listeners:
+            self._emit({
+                'type': 'stop', 'chat_id': chat_id, 'game': game,
+                'tournament_id': tournament['tournament_id'],
+                'total_wins': results['total_wins'], 'total_players': results['total_players']
+            })
+        return results
+    
+    def add_win(self, chat_id: int, user_id: int, user_name: str = "", game: str = DEFAULT_GAME,
+                points: int = 1) -> bool:
+        """Добавляет игроку очки (для 🎰 - одну победу)"""
+        key = (chat_id, game)
+        with self.lock:
+            tournament = self.active_tournaments.get(key)
+            if tournament is None or not tournament['is_active']:
+                return False
+            
+            stats = self.player_stats[key]
+            stats[user_id] += points
+            if user_name:
+                self.player_names[user_id] = user_name
             
-            return None
+            tournament['message_count'] += points
+            tournament['version'] += 1
+            self._touch(chat_id)
+            score = stats[user_id]
+        
+        if self._listeners:
+            self._emit({
+                'type': 'score', 'chat_id': chat_id, 'game': game,
+                'tournament_id': tournament['tournament_id'], 'version': tournament['version'],
+                'user_id': user_id, 'name': self.player_names.get(user_id), 'score': score,
+                'total': tournament['message_count']
+            })
+        return True
     
-    def add_win(self, chat_id: int, user_id: int, user_name: str = "") -> bool:
-        """Добавляет победу игроку"""
+    def record_roll(self, chat_id: int, user_id: int, value: int):
+        """Учитывает бросок 🎰 (горячий путь: два инкремента, без lock)"""
+        histogram = self.user_rolls.get(user_id)
+        if histogram is None:
+            histogram = self.user_rolls[user_id] = array('I', bytes(4 * SLOT_VALUES))
+        histogram[value - 1] += 1
+        
+        histogram = self.chat_rolls.get(chat_id)
+        if histogram is None:
+            histogram = self.chat_rolls[chat_id] = array('I', bytes(4 * SLOT_VALUES))
+        histogram[value - 1] += 1
+    
+    def roll_snapshot(self) -> Tuple[Dict[int, array], Dict[int, array]]:
+        """Копии гистограмм игроков и чатов для анализа вне event loop
+        
+        record_roll меняет гистограммы без lock, поэтому анализ работает только с копиями.
+        """
+        users = {user_id: array('I', h) for user_id, h in list(self.user_rolls.items())}
+        chats = {chat_id: array('I', h) for chat_id, h in list(self.chat_rolls.items())}
+        return users, chats
+    
+    def _update_lifetime(self, chat_id: int, game: str, stats: Dict[int, int]):
+        """Обновляет накопительную статистику за O(участников) (вызывается под lock)"""
+        best_score = max(stats.values(), default=0)
+        chat_records = self.chat_lifetime.setdefault((chat_id, game), {})
+        global_records = self.global_lifetime.setdefault(game, {})
+        
+        for user_id, wins in stats.items():
+            for records in (chat_records, global_records):
+                record = records.get(user_id)
+                if record is None:
+                    record = records[user_id] = {'wins': 0, 'played': 0, 'won': 0, 'best': 0}
+                record['wins'] += wins
+                record['played'] += 1
+                record['best'] = max(record['best'], wins)
+                if best_score > 0 and wins == best_score:
+                    record['won'] += 1
+        
+        # Сбрасываем закэшированные топы этой игры: в чате и глобальный
+        for key in [key for key in self._top_cache if key[0] in (chat_id, None) and key[1] == game]:
+            del self._top_cache[key]
+    
+    def _lifetime_records(self, chat_id: Optional[int], game: str) -> Dict[int, Dict[str, int]]:
+        """Накопительные записи игры в чате или глобально"""
+        if chat_id is None:
+            return self.global_lifetime.get(game, {})
+        return self.chat_lifetime.get((chat_id, game), {})
+    
+    def get_lifetime_stats(self, user_id: int, chat_id: Optional[int] = None,
+                           game: str = DEFAULT_GAME) -> Optional[Dict[str, int]]:
+        """Возвращает статистику игрока за все время (в чате или глобально)"""
+        record = self._lifetime_records(chat_id, game).get(user_id)
+        return dict(record) if record else None
+    
+    def get_lifetime_rank(self, user_id: int, chat_id: Optional[int] = None, key: str = 'wins',
+                          game: str = DEFAULT_GAME) -> Optional[int]:
+        """Возвращает место игрока, если он входит в закэшированный топ"""
+        for place, (uid, _) in enumerate(self.get_top_players(chat_id, key=key, game=game), 1):
+            if uid == user_id:
+                return place
+        return None
+    
+    def get_top_players(self, chat_id: Optional[int] = None, limit: int = 10, key: str = 'wins',
+                        game: str = DEFAULT_GAME) -> List[Tuple[int, Dict[str, int]]]:
+        """Возвращает топ игроков за все время без обхода истории турниров"""
+        cache_key = (chat_id, game, key, limit)
         with self.lock:
-            if chat_id in self.active_tournaments and self.active_tournaments[chat_id]['is_active']:
-                self.player_stats[chat_id][user_id] += 1
-                
-                if chat_id in self.active_tournaments:
-                    self.active_tournaments[chat_id]['message_count'] += 1
-                
-                return True
-            return False
+            top = self._top_cache.get(cache_key)
+            if top is None:
+                records = self._lifetime_records(chat_id, game)
+                top = heapq.nlargest(limit, records.items(), key=lambda item: (item[1][key], item[1]['won']))
+                self._top_cache[cache_key] = top
+            return top
     
-    def is_tournament_active(self, chat_id: int) -> bool:
+    def is_tournament_active(self, chat_id: int, game: str = DEFAULT_GAME) -> bool:
         """Проверяет активен ли турнир"""
-        return chat_id in self.active_tournaments and self.active_tournaments[chat_id]['is_active']
+        tournament = self.active_tournaments.get((chat_id, game))
+        return tournament is not None and tournament['is_active']
     
-    def get_tournament_info(self, chat_id: int) -> Optional[Dict]:
+    def get_tournament_info(self, chat_id: int, game: str = DEFAULT_GAME) -> Optional[Dict]:
         """Возвращает информацию о турнире"""
-        return self.active_tournaments.get(chat_id)
+        return self.active_tournaments.get((chat_id, game))
+    
+    def get_tournament_by_id(self, tournament_id: int) -> Optional[Dict]:
+        """Возвращает активный турнир по его номеру"""
+        key = self._active_ids.get(tournament_id)
+        return self.active_tournaments.get(key) if key else None
+    
+    def get_chat_tournaments(self, chat_id: int) -> List[Dict]:
+        """Возвращает активные турниры чата по всем играм"""
+        return [
+            tournament for game in GAMES
+            if (tournament := self.active_tournaments.get((chat_id, game))) and tournament['is_active']
+        ]
     
-    def get_stats(self, chat_id: int) -> List[Tuple[int, int]]:
+    def get_stats(self, chat_id: int, game: str = DEFAULT_GAME) -> List[Tuple[int, int]]:
         """Возвращает статистику турнира"""
-        if chat_id in self.player_stats:
-            stats = self.player_stats[chat_id]
+        stats = self.player_stats.get((chat_id, game))
+        if stats is not None:
             return sorted(stats.items(), key=lambda x: x[1], reverse=True)
         return []
     
+    def get_player_score(self, chat_id: int, user_id: int, game: str = DEFAULT_GAME) -> int:
+        """Возвращает текущий счет игрока без сортировки статистики"""
+        return self.player_stats.get((chat_id, game), {}).get(user_id, 0)
+    
     def get_all_active_tournaments(self) -> List[Dict]:
         """Возвращает все активные турниры"""
         return [tournament for tournament in self.active_tournaments.values() if tournament['is_active']]
     
+    # ========== ПАМЯТЬ И ВЫГРУЗКА НЕАКТИВНЫХ ЧАТОВ ==========
+    
+    def attach_offload_dir(self, directory: str):
+        """Подключает каталог выгруженных чатов; уже выгруженные находятся по именам файлов"""
+        os.makedirs(directory, exist_ok=True)
+        self.offload_dir = directory
+        self._offloaded = {
+            int(stem) for stem, ext in map(os.path.splitext, os.listdir(directory))
+            if ext == '.json' and stem.lstrip('-').isdigit()
+        }
+        
+        # Чаты из резервной копии получают полный срок жизни от момента запуска
+        now = time.monotonic()
+        for chat_id in self.chat_ids():
+            self.chat_last_seen.setdefault(chat_id, now)
+    
+    def offload_path(self, chat_id: int) -> str:
+        return os.path.join(self.offload_dir, f"{chat_id}.json")
+    
+    def ensure_chat(self, chat_id: int, touch: bool = True):
+        """Отмечает активность чата и возвращает в память его выгруженное состояние
+        
+        Вызывается на каждое обновление: одна запись в словарь и проверка множества.
+        touch=False (чтение через API) не продлевает жизнь чату, который уже в памяти.
+        """
+        if touch:
+            self.chat_last_seen[chat_id] = time.monotonic()
+        if chat_id in self._offloaded:
+            self._rehydrate(chat_id)
+    
+    def is_offloaded(self, chat_id: int) -> bool:
+        return chat_id in self._offloaded
+    
+    @property
+    def offloaded_count(self) -> int:
+        return len(self._offloaded)
+    
+    def chat_ids(self) -> Set[int]:
+        """Чаты, у которых есть состояние в памяти"""
+        chats = {chat_id for chat_id, _ in self.active_tournaments}
+        chats.update(chat_id for chat_id, _ in self.chat_lifetime)
+        chats.update(self.chat_rolls)
+        return chats
+    
+    def _chat_state(self, chat_id: int) -> Dict:
+        """Ссылки на все состояние чата по играм (без копирования)"""
+        state = {'tournaments': {}, 'stats': {}, 'lifetime': {}, 'rolls': self.chat_rolls.get(chat_id)}
+        for game in GAMES:
+            key = (chat_id, game)
+            if key in self.active_tournaments:
+                state['tournaments'][game] = self.active_tournaments[key]
+                state['stats'][game] = self.player_stats.get(key, {})
+            if key in self.chat_lifetime:
+                state['lifetime'][game] = self.chat_lifetime[key]
+        return state
+    
+    def chat_memory(self, chat_id: int) -> int:
+        """Оценка памяти, занятой состоянием чата, в байтах"""
+        return deep_sizeof(self._chat_state(chat_id))
+    
+    def memory_report(self) -> List[Dict]:
+        """Память и число участников по каждому чату в памяти"""
+        now = time.monotonic()
+        report = []
+        for chat_id in self.chat_ids():
+            state = self._chat_state(chat_id)
+            participants = set()
+            for stats in state['stats'].values():
+                participants.update(stats)
+            for records in state['lifetime'].values():
+                participants.update(records)
+            
+            seen = self.chat_last_seen.get(chat_id)
+            report.append({
+                'chat_id': chat_id,
+                'title': next((t['chat_title'] for t in state['tournaments'].values() if t.get('chat_title')), ''),
+                'bytes': deep_sizeof(state),
+                'participants': len(participants),
+                'tournaments': len(state['tournaments']),
+                'idle': now - seen if seen is not None else None
+            })
+        return report
+    
+    def idle_chats(self, idle_ttl: float, now: Optional[float] = None) -> List[int]:
+        """Чаты без обновлений дольше idle_ttl секунд"""
+        if now is None:
+            now = time.monotonic()
+        return [chat_id for chat_id, seen in self.chat_last_seen.items() if now - seen >= idle_ttl]
+    
+    def export_chat(self, chat_id: int) -> Optional[str]:
+        """JSON состояния чата для выгрузки; None, если в памяти у чата ничего нет"""
+        with self.lock:
+            self._stale_offloads.discard(chat_id)  # файл сейчас перепишут
+            state = self._chat_state(chat_id)
+            if not state['tournaments'] and not state['lifetime'] and state['rolls'] is None:
+                return None
+            data = {
+                'chat_id': chat_id,
+                'tournaments': list(state['tournaments'].values()),
+                'stats': state['stats'],
+                'lifetime': state['lifetime'],
+                'rolls': state['rolls'].tolist() if state['rolls'] is not None else None
+            }
+            return json.dumps(data, default=datetime_serializer, ensure_ascii=False)
+    
+    def drop_chat(self, chat_id: int):
+        """Убирает состояние чата из памяти; вызывать только после записи файла выгрузки"""
+        with self.lock:
+            for game in GAMES:
+                key = (chat_id, game)
+                tournament = self.active_tournaments.pop(key, None)
+                if tournament is not None:
+                    self._active_ids.pop(tournament['tournament_id'], None)
+                self.player_stats.pop(key, None)
+                self.chat_lifetime.pop(key, None)
+            self.chat_rolls.pop(chat_id, None)
+            for key in [key for key in self._top_cache if key[0] == chat_id]:
+                del self._top_cache[key]
+            
+            self.chat_last_seen.pop(chat_id, None)
+            self._offloaded.add(chat_id)
+            self._touch(chat_id)
+            self.evicted += 1
+    
+    def keep_offload_file(self, chat_id: int):
+        """Оставляет файл чата, который остался в памяти, до следующей резервной копии"""
+        with self.lock:
+            self._stale_offloads.add(chat_id)
+    
+    def forget_chat(self, chat_id: int):
+        """Забывает время активности чата без состояния"""
+        self.chat_last_seen.pop(chat_id, None)
+    
+    def _rehydrate(self, chat_id: int):
+        """Возвращает выгруженный чат в память
+        
+        Файл выгрузки новее резервной копии: турниры, статистика и броски чата
+        берутся из него, даже если копия после аварийного перезапуска их содержит.
+        """
+        path = self.offload_path(chat_id)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            self._offloaded.discard(chat_id)
+            return
+        except (OSError, ValueError) as e:
+            # Битый файл откладываем для ручного разбора, чтобы не повторять ошибку на каждое обновление
+            print(f"Ошибка загрузки выгруженного чата {chat_id}: {e}")
+            self._offloaded.discard(chat_id)
+            try:
+                os.replace(path, f"{path}.broken")
+            except OSError:
+                pass
+            return
+        
+        with self.lock:
+            for tournament in data.get('tournaments', []):
+                stale = self.active_tournaments.pop((chat_id, tournament['game']), None)
+                if stale is not None:
+                    self._active_ids.pop(stale['tournament_id'], None)
+                self._restore_tournament(tournament, data['stats'].get(tournament['game'], {}))
+            
+            for game, records in data.get('lifetime', {}).items():
+                self.chat_lifetime[(chat_id, game)] = {int(user_id): record for user_id, record in records.items()}
+            for key in [key for key in self._top_cache if key[0] == chat_id]:
+                del self._top_cache[key]
+            
+            if data.get('rolls'):
+                self.chat_rolls[chat_id] = array('I', data['rolls'])
+            
+            self._offloaded.discard(chat_id)
+            # Файл удалит следующая резервная копия: до нее чат есть только в нем
+            self._stale_offloads.add(chat_id)
+            # Возвращенный чат снова участвует в выгрузке, даже если его только прочитали
+            self.chat_last_seen.setdefault(chat_id, time.monotonic())
+            self._touch(chat_id)
+            self.rehydrated += 1
+    
+    def _restore_tournament(self, tournament: Dict, stats: Dict):
+        """Регистрирует активный турнир из JSON (вызывается под lock)"""
+        parse_datetimes(tournament)
+        tournament.setdefault('game', DEFAULT_GAME)
+        tournament.setdefault('version', 0)
+        key = (tournament['chat_id'], tournament['game'])
+        
+        # Номер мог достаться другому турниру после перезапуска - выдаем новый
+        tournament_id = tournament.get('tournament_id')
+        if tournament_id is None or tournament_id in self._active_ids or tournament_id in self.tournament_results:
+            tournament_id = tournament['tournament_id'] = self._next_tournament_id
+        self._next_tournament_id = max(self._next_tournament_id, tournament_id + 1)
+        
+        self.active_tournaments[key] = tournament
+        self._active_ids[tournament_id] = key
+        self.player_stats[key] = defaultdict(int, {int(user_id): score for user_id, score in stats.items()})
+    
     def save_to_file(self, filename: str = "tournaments_backup.json"):
-        """Сохраняет данные в файл (для резервного копирования)"""
+        """Атомарно сохраняет состояние в файл (резервная копия, в том числе периодическая)"""
         with self.lock:
             data = {
-                'active_tournaments': self.active_tournaments,
+                'active_tournaments': list(self.active_tournaments.values()),
+                # Счет активных турниров по играм: {игра: {chat_id: {user_id: очки}}}
+                'player_stats': self._player_stats_by_game(),
                 'tournament_history': self.tournament_history,
+                # Ключи JSON - только строки: chat_lifetime раскладываем по играм
+                'chat_lifetime': self._chat_lifetime_by_game(),
+                'global_lifetime': self.global_lifetime,
+                'player_names': self.player_names,
+                'user_rolls': {user_id: h.tolist() for user_id, h in self.user_rolls.items()},
+                'chat_rolls': {chat_id: h.tolist() for chat_id, h in self.chat_rolls.items()},
                 'backup_time': datetime.now().isoformat()
             }
-            
-            # Конвертируем datetime в строки для JSON
-            def datetime_serializer(obj):
-                if isinstance(obj, datetime):
-                    return obj.isoformat()
-                raise TypeError(f"Type {type(obj)} not serializable")
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, default=datetime_serializer, ensure_ascii=False, indent=2)
+            payload = json.dumps(data, default=datetime_serializer, ensure_ascii=False, indent=2)
+            stale = set(self._stale_offloads)
+        
+        # Пишем вне lock: броски не ждут диска. Прерванная запись не портит прошлую копию
+        temp = f"{filename}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(temp, filename)
+        
+        # Чаты, вернувшиеся из выгрузки, теперь есть в копии - их файлы больше не нужны
+        with self.lock:
+            stale &= self._stale_offloads
+            self._stale_offloads -= stale
+        for chat_id in stale:
+            try:
+                os.remove(self.offload_path(chat_id))
+            except OSError:
+                pass
+    
+    def _player_stats_by_game(self) -> Dict[str, Dict[int, Dict[int, int]]]:
+        """Раскладывает player_stats в вид {игра: {chat_id: счет}}"""
+        by_game: Dict[str, Dict[int, Dict[int, int]]] = {}
+        for (chat_id, game), stats in self.player_stats.items():
+            by_game.setdefault(game, {})[chat_id] = dict(stats)
+        return by_game
+    
+    def _chat_lifetime_by_game(self) -> Dict[str, Dict[int, Dict]]:
+        """Раскладывает chat_lifetime в вид {игра: {chat_id: записи}}"""
+        by_game: Dict[str, Dict[int, Dict]] = {}
+        for (chat_id, game), records in self.chat_lifetime.items():
+            by_game.setdefault(game, {})[chat_id] = records
+        return by_game
+    
+    @staticmethod
+    def _lifetime_by_game(data: Dict) -> Dict[str, Dict]:
+        """Старые резервные копии хранили статистику только 🎰, без уровня игры"""
+        if data and all(key in GAMES for key in data):
+            return data
+        return {DEFAULT_GAME: data} if data else {}
     
     def load_from_file(self, filename: str = "tournaments_backup.json") -> bool:
         """Загружает данные из файла"""
@@ -123,15 +567,79 @@ class TournamentManager:
             with open(filename, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
-            # Здесь нужно конвертировать строки обратно в datetime
-            # Упрощенная версия - только для истории
-            
             if 'tournament_history' in data:
                 self.tournament_history = data['tournament_history']
+                self.tournament_results = {}
+                for results in self.tournament_history:
+                    tournament = parse_datetimes(results['tournament_data'])
+                    tournament.setdefault('game', DEFAULT_GAME)
+                    results['player_stats'] = {
+                        int(user_id): score for user_id, score in results['player_stats'].items()
+                    }
+                    # Кнопки рейтингов под старыми итогами работают и после перезапуска
+                    if 'tournament_id' in tournament:
+                        self.tournament_results[tournament['tournament_id']] = results
+                
+                # Новые турниры продолжают нумерацию после сохраненных
+                self._next_tournament_id = max(list(self.tournament_results) + [self._next_tournament_id - 1]) + 1
+            
+            # Идущие турниры продолжаются со счетом на момент сохранения
+            if 'active_tournaments' in data:
+                stats_by_game = data.get('player_stats', {})
+                active = data['active_tournaments']
+                # Старые копии хранили турниры словарем {chat_id: турнир} без поля chat_id
+                if isinstance(active, dict):
+                    active = [dict(tournament, chat_id=int(chat_id)) for chat_id, tournament in active.items()]
+                with self.lock:
+                    self.active_tournaments = {}
+                    self.player_stats = {}
+                    self._active_ids = {}
+                    for tournament in active:
+                        game = tournament.setdefault('game', DEFAULT_GAME)
+                        stats = stats_by_game.get(game, {}).get(str(tournament['chat_id']), {})
+                        self._restore_tournament(tournament, stats)
+            
+            # JSON хранит ключи строками - возвращаем int
+            if 'chat_lifetime' in data:
+                self.chat_lifetime = {}
+                for game, chats in self._lifetime_by_game(data['chat_lifetime']).items():
+                    for chat_id, records in chats.items():
+                        self.chat_lifetime[(int(chat_id), game)] = {
+                            int(user_id): record for user_id, record in records.items()
+                        }
+            if 'global_lifetime' in data:
+                self.global_lifetime = {
+                    game: {int(user_id): record for user_id, record in records.items()}
+                    for game, records in self._lifetime_by_game(data['global_lifetime']).items()
+                }
+            if 'player_names' in data:
+                self.player_names = {int(user_id): name for user_id, name in data['player_names'].items()}
+            self._top_cache.clear()
+            if 'user_rolls' in data:
+                self.user_rolls = {int(user_id): array('I', h) for user_id, h in data['user_rolls'].items()}
+            if 'chat_rolls' in data:
+                self.chat_rolls = {int(chat_id): array('I', h) for chat_id, h in data['chat_rolls'].items()}
+            
+            # История и статистика заменены целиком - все закэшированные ответы устарели
+            with self.lock:
+                self.version += 1
+                self.history_version += 1
+                self.chat_versions = {chat_id: version + 1 for chat_id, version in self.chat_versions.items()}
             
             return True
         except (FileNotFoundError, json.JSONDecodeError):
             return False
+        except (KeyError, TypeError, AttributeError, ValueError) as e:
+            # Битая или непонятная копия не должна останавливать запуск бота
+            print(f"Ошибка загрузки резервной копии {filename}: {e}")
+            return False
 
 # Глобальный менеджер турниров
 tournament_manager = TournamentManager()
+
+def get_tournament_manager(context) -> TournamentManager:
+    """Менеджер турниров бота, обрабатывающего обновление
+
+    В мультибот-режиме у каждого бота свой менеджер в bot_data, иначе - глобальный.
+    """
+    return context.bot_data.get('tournament_manager', tournament_manager)
@@ -0,0 +1,103 @@
+"""
+Генератор фейковых обновлений Telegram для локальной проверки без сети
+"""
+
+import json
+import random
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+from telegram.request import BaseRequest
+
+FAKE_BOT_ID = 777000
+FAKE_ADMIN_ID = 1  # создатель всех фейковых чатов
+
+def make_user(user_id: int) -> Dict:
+    """Создает пользователя в формате Bot API"""
+    return {'id': user_id, 'is_bot': False, 'first_name': f"Игрок{user_id}"}
+
+def make_chat(chat_id: int) -> Dict:
+    """Создает групповой чат в формате Bot API"""
+    return {'id': chat_id, 'type': 'supergroup', 'title': f"Чат {chat_id}"}
+
+def make_message_update(update_id: int, chat_id: int, user_id: int, **fields) -> Dict:
+    """Создает обновление с новым сообщением"""
+    message = {
+        'message_id': update_id,
+        'date': int(time.time()),
+        'chat': make_chat(chat_id),
+        'from': make_user(user_id)
+    }
+    message.update(fields)
+    return {'update_id': update_id, 'message': message}
+
+def make_dice_update(update_id: int, chat_id: int, user_id: int, value: int, emoji: str = "🎰") -> Dict:
+    """Создает обновление с броском эмодзи"""
+    return make_message_update(update_id, chat_id, user_id, dice={'emoji': emoji, 'value': value})
+
+def make_command_update(update_id: int, chat_id: int, user_id: int, command: str, args: str = "") -> Dict:
+    """Создает обновление с командой бота"""
+    text = f"/{command} {args}".strip()
+    entities = [{'type': 'bot_command', 'offset': 0, 'length': len(command) + 1}]
+    return make_message_update(update_id, chat_id, user_id, text=text, entities=entities)
+
+def generate_updates(count: int, chats: int, users_per_chat: int, admin_id: int,
+                     seed: Optional[int] = None) -> Iterator[Dict]:
+    """Генерирует /start в каждом чате, затем случайные броски 🎰"""
+    rng = random.Random(seed)
+    chat_ids = [-1001000000000 - i for i in range(chats)]
+    update_id = 0
+
+    for chat_id in chat_ids:
+        update_id += 1
+        yield make_command_update(update_id, chat_id, admin_id, 'start')
+
+    for _ in range(count):
+        update_id += 1
+        chat_id = rng.choice(chat_ids)
+        user_id = 100000 + rng.randrange(users_per_chat) + abs(chat_id) % 1000 * users_per_chat
+        yield make_dice_update(update_id, chat_id, user_id, rng.randint(1, 64))
+
+class OfflineRequest(BaseRequest):
+    """Заглушка HTTP-запросов: отвечает правдоподобными данными без сети"""
+
+    def __init__(self):
+        self.calls: Counter = Counter()
+
+    @property
+    def read_timeout(self) -> Optional[float]:
+        return None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=BaseRequest.DEFAULT_NONE,
+                         write_timeout=BaseRequest.DEFAULT_NONE, connect_timeout=BaseRequest.DEFAULT_NONE,
+                         pool_timeout=BaseRequest.DEFAULT_NONE):
+        """Возвращает ответ Bot API для вызванного метода"""
+        endpoint = url.rsplit('/', 1)[-1]
+        self.calls[endpoint] += 1
+        parameters = request_data.parameters if request_data else {}
+        chat_id = int(parameters.get('chat_id', 0) or 0)
+
+        if endpoint == 'getMe':
+            result = {'id': FAKE_BOT_ID, 'is_bot': True, 'first_name': 'Offline', 'username': 'offline_bot'}
+        elif endpoint == 'getChat':
+            result = {'id': chat_id, 'type': 'private', 'first_name': f"Игрок{chat_id}"}
+        elif endpoint in ('sendMessage', 'editMessageText'):
+            result = {
+                'message_id': self.calls[endpoint],
+                'date': int(time.time()),
+                'chat': make_chat(chat_id),
+                'text': parameters.get('text', '')
+            }
+        elif endpoint == 'getChatAdministrators':
+            result: List = [{'status': 'creator', 'user': make_user(FAKE_ADMIN_ID), 'is_anonymous': False}]
+        else:
+            result = True
+
+        return 200, json.dumps({'ok': True, 'result': result}).encode('utf-8')
@@ -0,0 +1,10 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from database import get_tournament_manager
+
+async def track_chat_activity(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Отмечает активность чата и возвращает его выгруженное состояние до остальных обработчиков"""
+    chat = update.effective_chat
+    if chat is not None:
+        get_tournament_manager(context).ensure_chat(chat.id)
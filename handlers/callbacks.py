@@ -0,0 +1,98 @@
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.error import BadRequest
+from telegram.ext import ContextTypes
+
+from database import TournamentManager, get_tournament_manager
+from utils import templates
+from utils.pagination import FINISHED, build_keyboard, leaderboard_pages
+from utils.scoring import GAMES
+
+def results_header(results: Dict) -> str:
+    """Заголовок итогов завершенного турнира"""
+    tournament_data = results['tournament_data']
+    duration = tournament_data['end_time'] - tournament_data['start_time']
+    hours, remainder = divmod(int(duration.total_seconds()), 3600)
+    minutes, seconds = divmod(remainder, 60)
+
+    game = tournament_data['game']
+    return templates.RESULTS_HEADER.format(
+        hours=hours, minutes=minutes, seconds=seconds,
+        players=results['total_players'], total=results['total_wins'],
+        emoji=game, unit=GAMES[game]['unit']
+    )
+
+def leaderboard_source(tournament_manager: TournamentManager, chat_id: int, tournament_id: int) -> Optional[Tuple[int, Callable[[], Sequence], str, str, str]]:
+    """Находит рейтинг турнира: (версия, загрузка строк, заголовок, подвал, эмодзи игры)"""
+    tournament = tournament_manager.get_tournament_by_id(tournament_id)
+    if tournament and tournament['chat_id'] == chat_id:
+        game = tournament['game']
+        return (
+            tournament['version'],
+            lambda: tournament_manager.get_stats(chat_id, game),
+            templates.STATS_HEADER.format(emoji=game),
+            "",
+            game
+        )
+
+    results = tournament_manager.tournament_results.get(tournament_id)
+    if results and results['tournament_data']['chat_id'] == chat_id:
+        return (
+            FINISHED,
+            lambda: list(results['player_stats'].items()),
+            results_header(results),
+            templates.RESULTS_FOOTER,
+            results['tournament_data']['game']
+        )
+
+    return None
+
+def render_leaderboard_page(tournament_manager: TournamentManager, chat_id: int, tournament_id: int, page: int):
+    """Возвращает (текст, клавиатура) страницы рейтинга или None, если турнир не найден"""
+    source = leaderboard_source(tournament_manager, chat_id, tournament_id)
+    if source is None:
+        return None
+
+    version, load_rows, header, footer, emoji = source
+    # Номера турниров у каждого бота свои - в ключе кэша пространство имен менеджера
+    text, page, pages = leaderboard_pages.get_page(
+        (tournament_manager.namespace, tournament_id), version, load_rows, page,
+        tournament_manager.player_names, header=header, footer=footer, emoji=emoji
+    )
+    return text, build_keyboard(tournament_id, page, pages)
+
+async def leaderboard_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Листание рейтинга кнопками: редактирует то же сообщение"""
+    tournament_manager = get_tournament_manager(context)
+    query = update.callback_query
+    chat_id = query.message.chat.id
+    _, tournament_id, page = query.data.split(':')
+    tournament_id = int(tournament_id)
+
+    source = leaderboard_source(tournament_manager, chat_id, tournament_id)
+    if source is None:
+        await query.answer("⌛ Этот рейтинг больше недоступен", show_alert=True)
+        return
+
+    if page == 'me':
+        version, load_rows = source[:2]
+        user_page = leaderboard_pages.find_user_page((tournament_manager.namespace, tournament_id), version, load_rows, query.from_user.id)
+        if user_page is None:
+            await query.answer("😔 Вас нет в рейтинге этого турнира", show_alert=True)
+            return
+        page = user_page
+
+    rendered = render_leaderboard_page(tournament_manager, chat_id, tournament_id, int(page))
+    if rendered is None:
+        await query.answer("⌛ Этот рейтинг больше недоступен", show_alert=True)
+        return
+    text, reply_markup = rendered
+    await query.answer()
+
+    try:
+        await query.edit_message_text(text, parse_mode=ParseMode.HTML, reply_markup=reply_markup)
+    except BadRequest as e:
+        # Та же страница без изменений - это не ошибка
+        if 'not modified' not in str(e):
+            raise
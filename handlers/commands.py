@@ -1,50 +1,77 @@
+import asyncio
 import logging
+import html
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
 
 from config import config
-from database import tournament_manager
+from database import TournamentManager, get_tournament_manager
+from utils.admins import is_chat_admin
+from utils import templates
+from utils.scoring import DEFAULT_GAME, GAMES, split_game_args
+from utils.chat_settings import SETTINGS, ChatSettingsStore, get_chat_settings
+from handlers.callbacks import render_leaderboard_page
+
+logger = logging.getLogger(__name__)
+
+def resolve_game(tournament_manager: TournamentManager, chat_id: int, args) -> Tuple[Optional[str], List[str]]:
+    """Игра из аргументов команды; без нее - единственный активный турнир чата или 🎰
+
+    Возвращает None, если в чате идет несколько турниров и игра не указана.
+    """
+    game, rest = split_game_args(args or [])
+    if game is None:
+        active = tournament_manager.get_chat_tournaments(chat_id)
+        if len(active) > 1:
+            return None, rest
+        game = active[0]['game'] if active else DEFAULT_GAME
+    return game, rest
+
+async def reply_choose_game(tournament_manager: TournamentManager, update: Update, command: str):
+    """Просит указать игру, когда в чате несколько турниров"""
+    games = " ".join(t['game'] for t in tournament_manager.get_chat_tournaments(update.effective_chat.id))
+    await update.message.reply_text(
+        f"🎮 В этом чате идет несколько турниров: {games}\n"
+        f"Укажите игру, например: /{command} 🎯",
+        parse_mode=ParseMode.HTML
+    )
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /start"""
+    tournament_manager = get_tournament_manager(context)
     user = update.effective_user
     chat = update.effective_chat
     
     # Личный чат с ботом
     if chat.type == 'private':
         await update.message.reply_text(
-            f"👋 Привет, {user.first_name}!\n\n"
-            f"🎰 Я бот для проведения турниров по эмодзи 777.\n\n"
-            f"📋 **Как использовать:**\n"
-            f"1. Добавьте меня в группу\n"
-            f"2. Дайте права администратора\n"
-            f"3. В группе напишите /start для начала турнира\n"
-            f"4. Напишите /stop для завершения турнира\n\n"
-            f"🏆 Во время турнира я считаю все выпавшие 777 🎰\n"
-            f"📊 После /stop показываю статистику и определяю победителя!\n\n"
-            f"👑 Админские команды работают только от администратора чата."
+            templates.PRIVATE_WELCOME.format(name=templates.escape_name(user.id, user.first_name)),
+            parse_mode=ParseMode.HTML
         )
         return
     
     # Групповой чат - проверяем админа
-    if user.id != config.ADMIN_ID:
+    if not await is_chat_admin(update, context):
         await update.message.reply_text(
             "⛔ Эта команда только для администратора чата!",
             parse_mode=ParseMode.HTML
         )
         return
     
-    # Парсим аргументы (время турнира)
+    # Парсим аргументы (игра и время турнира)
+    game, args = split_game_args(context.args or [])
+    game = game or DEFAULT_GAME
     duration = None
-    if context.args:
+    if args:
         try:
-            duration = int(context.args[0])
-            if duration <= 0 or duration > config.MAX_TOURNAMENT_DURATION:
+            duration = int(args[0])
+            max_duration = get_chat_settings(context).get(chat.id).max_duration
+            if duration <= 0 or duration > max_duration:
                 await update.message.reply_text(
-                    f"⏱️ Укажите длительность от 1 до {config.MAX_TOURNAMENT_DURATION} минут!\n"
+                    f"⏱️ Укажите длительность от 1 до {max_duration} минут!\n"
                     f"Пример: /start 60 (турнир на 1 час)",
                     parse_mode=ParseMode.HTML
                 )
@@ -57,17 +84,17 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
     
-    # Проверяем, не активен ли уже турнир
-    if tournament_manager.is_tournament_active(chat.id):
+    # Проверяем, не активен ли уже турнир по этой игре
+    if tournament_manager.is_tournament_active(chat.id, game):
         await update.message.reply_text(
-            "⚠️ В этом чате уже идет турнир!\n"
-            "Используйте /stop чтобы завершить текущий турнир.",
+            f"⚠️ В этом чате уже идет турнир {game}!\n"
+            f"Используйте /stop {game} чтобы завершить текущий турнир.",
             parse_mode=ParseMode.HTML
         )
         return
     
     # Запускаем турнир
-    success = tournament_manager.start_tournament(chat.id, chat.title, duration)
+    success = tournament_manager.start_tournament(chat.id, chat.title, duration, game)
     
     if not success:
         await update.message.reply_text(
@@ -77,32 +104,16 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Формируем сообщение о начале турнира
-    duration_text = f"⏱️ **Длительность:** {duration} минут" if duration else "⏱️ **Без ограничения по времени**"
-    
-    rules_text = (
-        "📋 **Правила:**\n"
-        "✅ Учитываются только свежие сообщения\n"
-        "❌ Пересланные 🎰 не засчитываются\n"
-        "❌ Сообщения старше 2 минут игнорируются\n\n"
-        "⚖️ **Только честная игра!**"
-    )
+    duration_text = templates.DURATION_LIMITED.format(minutes=duration) if duration else templates.DURATION_UNLIMITED
     
     await update.message.reply_text(
-        f"🎰 **ТУРНИР НАЧАЛСЯ!** 🎰\n\n"
-        f"📊 Веду подсчет всех выпавших 777.\n"
-        f"{duration_text}\n"
-        f"🏆 Победит игрок с наибольшим количеством 777!\n\n"
-        f"{rules_text}\n\n"
-        f"**Команды:**\n"
-        f"`/stop` - завершить турнир\n"
-        f"`/stats` - текущая статистика\n"
-        f"`/rules` - правила турнира",
+        templates.TOURNAMENT_STARTED.format(duration=duration_text, emoji=game, unit=GAMES[game]['unit']),
         parse_mode=ParseMode.HTML
     )
 
 async def stop_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /stop"""
-    user = update.effective_user
+    tournament_manager = get_tournament_manager(context)
     chat = update.effective_chat
     
     # Только в групповых чатах
@@ -114,15 +125,20 @@ async def stop_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Только для админа
-    if user.id != config.ADMIN_ID:
+    if not await is_chat_admin(update, context):
         await update.message.reply_text(
             "⛔ Только администратор может завершить турнир!",
             parse_mode=ParseMode.HTML
         )
         return
     
+    game, _ = resolve_game(tournament_manager, chat.id, context.args)
+    if game is None:
+        await reply_choose_game(tournament_manager, update, 'stop')
+        return
+    
     # Останавливаем турнир
-    results = tournament_manager.stop_tournament(chat.id)
+    results = tournament_manager.stop_tournament(chat.id, game)
     
     if not results:
         await update.message.reply_text(
@@ -133,101 +149,59 @@ async def stop_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Отправляем результаты в чат
-    await send_tournament_results(update, results, chat)
+    await send_tournament_results(update, context, results, chat)
     
     # Отправляем детальный отчет админу
     await send_detailed_report_to_admin(context, results, chat)
 
-async def send_tournament_results(update: Update, results: Dict, chat):
+async def send_tournament_results(update: Update, context, results: Dict, chat):
     """Отправляет результаты турнира в чат"""
-    player_stats = results['player_stats']
-    tournament_data = results['tournament_data']
-    
-    if not player_stats:
+    tournament_manager = get_tournament_manager(context)
+    if not results['player_stats']:
+        game = results['tournament_data']['game']
         await update.message.reply_text(
-            "🎰 **ТУРНИР ОКОНЧЕН** 🎰\n\n"
-            "😔 За время турнира не было выбито ни одной комбинации 777.\n\n"
-            "📌 Помните: учитываются только свежие сообщения!\n\n"
-            "Ждем вас в следующем турнире! 🎉",
+            templates.RESULTS_EMPTY.format(emoji=game, unit=GAMES[game]['unit']),
             parse_mode=ParseMode.HTML
         )
         return
     
-    # Сортируем игроков
-    sorted_players = sorted(player_stats.items(), key=lambda x: x[1], reverse=True)
-    
-    # Формируем сообщение
-    results_text = "🏁 **ТУРНИР ОКОНЧЕН!** 🏁\n\n"
-    
-    # Статистика турнира
-    duration = tournament_data['end_time'] - tournament_data['start_time']
-    hours, remainder = divmod(int(duration.total_seconds()), 3600)
-    minutes, seconds = divmod(remainder, 60)
-    
-    results_text += f"📊 **Статистика турнира:**\n"
-    results_text += f"• ⏱️ Длительность: {hours:02d}:{minutes:02d}:{seconds:02d}\n"
-    results_text += f"• 👥 Участников: {len(sorted_players)}\n"
-    results_text += f"• 🎰 Всего 777: {sum(player_stats.values())}\n\n"
-    
-    # Топ игроков
-    results_text += "🏆 **ТОП ИГРОКОВ:** 🏆\n\n"
-    
-    for i, (user_id, wins) in enumerate(sorted_players[:10], 1):
-        try:
-            user_info = await update.message.bot.get_chat(user_id)
-            username = f"@{user_info.username}" if user_info.username else user_info.first_name
-            
-            if i == 1:
-                results_text += f"🥇 **{username}:** {wins} 🎰\n"
-            elif i == 2:
-                results_text += f"🥈 {username}: {wins} 🎰\n"
-            elif i == 3:
-                results_text += f"🥉 {username}: {wins} 🎰\n"
-            else:
-                results_text += f"{i}. {username}: {wins} 🎰\n"
-        except Exception as e:
-            results_text += f"{i}. ID{user_id}: {wins} 🎰\n"
-    
-    if len(sorted_players) > 10:
-        results_text += f"\n... и еще {len(sorted_players) - 10} участников"
-    
-    results_text += "\n\n🎉 **Поздравляем победителей!** 🎉"
-    
-    await update.message.reply_text(results_text, parse_mode=ParseMode.HTML)
+    # Первая страница итогов, остальные - кнопками
+    tournament_id = results['tournament_data']['tournament_id']
+    rendered = render_leaderboard_page(tournament_manager, chat.id, tournament_id, 0)
+    if rendered is None:
+        logger.warning(f"Итоги турнира {tournament_id} не найдены для чата {chat.id}")
+        return
+    text, reply_markup = rendered
+    await update.message.reply_text(text, parse_mode=ParseMode.HTML, reply_markup=reply_markup)
 
 async def send_detailed_report_to_admin(context, results: Dict, chat):
     """Отправляет детальный отчет админу"""
+    tournament_manager = get_tournament_manager(context)
     player_stats = results['player_stats']
     tournament_data = results['tournament_data']
     
     if not player_stats:
         return
     
-    sorted_players = sorted(player_stats.items(), key=lambda x: x[1], reverse=True)
-    
-    report = f"📊 **ОТЧЕТ О ТУРНИРЕ** 📊\n\n"
-    report += f"💬 Чат: {tournament_data['chat_title']}\n"
-    report += f"🆔 ID: `{chat.id}`\n\n"
-    
-    # Детальная статистика
-    report += f"📈 **Детальная статистика:**\n"
-    
-    for i, (user_id, wins) in enumerate(sorted_players, 1):
-        try:
-            user_info = await context.bot.get_chat(user_id)
-            username = f"@{user_info.username}" if user_info.username else user_info.first_name
-            report += f"{i}. {username} (ID: `{user_id}`): {wins} 🎰\n"
-        except:
-            report += f"{i}. ID{user_id}: {wins} 🎰\n"
-    
-    await context.bot.send_message(
-        chat_id=config.ADMIN_ID,
-        text=report,
-        parse_mode=ParseMode.HTML
+    header = templates.REPORT_HEADER.format(
+        chat_title=html.escape(tournament_data['chat_title'] or ''),
+        chat_id=chat.id
     )
+    
+    # Полный список может не влезть в одно сообщение - делим по строкам
+    for text in templates.render_leaderboard(
+        list(player_stats.items()), tournament_manager.player_names,
+        header=header, medals=False, show_ids=True, emoji=tournament_data['game']
+    ):
+        await context.bot.send_message(
+            chat_id=config.ADMIN_ID,
+            text=text,
+            parse_mode=ParseMode.HTML
+        )
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /stats"""
+    tournament_manager = get_tournament_manager(context)
     chat = update.effective_chat
     
     if chat.type not in ['group', 'supergroup']:
@@ -237,7 +211,12 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    if not tournament_manager.is_tournament_active(chat.id):
+    game, _ = resolve_game(tournament_manager, chat.id, context.args)
+    if game is None:
+        await reply_choose_game(tournament_manager, update, 'stats')
+        return
+    
+    if not tournament_manager.is_tournament_active(chat.id, game):
         await update.message.reply_text(
             "📭 В этом чате нет активного турнира!\n"
             "Используйте /start чтобы начать турнир.",
@@ -245,117 +224,332 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    stats = tournament_manager.get_stats(chat.id)
+    tournament = tournament_manager.get_tournament_info(chat.id, game)
     
-    if not stats:
+    if not tournament['message_count']:
         await update.message.reply_text(
-            "📊 **Текущая статистика:**\n\n"
-            "Пока никто не выбил 777. Ждем первого победителя! 🎰",
+            templates.STATS_EMPTY.format(emoji=game, unit=GAMES[game]['unit']),
             parse_mode=ParseMode.HTML
         )
         return
     
-    stats_text = "📊 **ТЕКУЩАЯ СТАТИСТИКА ТУРНИРА** 📊\n\n"
+    # Страница из кэша: сортировка только если счет изменился с прошлого показа
+    tournament_id = tournament['tournament_id']
+    rendered = render_leaderboard_page(tournament_manager, chat.id, tournament_id, 0)
+    if rendered is None:
+        await update.message.reply_text("📭 В этом чате нет активного турнира!")
+        return
+    text, reply_markup = rendered
+    await update.message.reply_text(text, parse_mode=ParseMode.HTML, reply_markup=reply_markup)
+
+async def top_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /top - лучшие игроки за все время (в группе - по чату, в личке - глобально)"""
+    tournament_manager = get_tournament_manager(context)
+    chat = update.effective_chat
+    chat_id = chat.id if chat.type in ['group', 'supergroup'] else None
+    game, _ = split_game_args(context.args or [])
+    game = game or DEFAULT_GAME
+    
+    top = tournament_manager.get_top_players(chat_id, limit=10, game=game)
+    if not top:
+        await update.message.reply_text(
+            "📭 Пока нет завершенных турниров.\n"
+            "Статистика появится после первого /stop.",
+            parse_mode=ParseMode.HTML
+        )
+        return
     
-    for i, (user_id, wins) in enumerate(stats[:10], 1):
-        try:
-            user_info = await context.bot.get_chat(user_id)
-            username = f"@{user_info.username}" if user_info.username else user_info.first_name
-            stats_text += f"{i}. {username}: {wins} 🎰\n"
-        except:
-            stats_text += f"{i}. ID{user_id}: {wins} 🎰\n"
+    title = f"🏆 <b>ЛУЧШИЕ ИГРОКИ ЧАТА ЗА ВСЕ ВРЕМЯ</b> {game}" if chat_id else f"🌍 <b>ЛУЧШИЕ ИГРОКИ ЗА ВСЕ ВРЕМЯ</b> {game}"
+    lines = [title, ""]
     
-    if len(stats) > 10:
-        stats_text += f"\n... и еще {len(stats) - 10} участников"
+    for i, (user_id, record) in enumerate(top, 1):
+        name = templates.display_name(user_id, tournament_manager.player_names)
+        lines.append(
+            f"{i}. {name}: {record['wins']} {game} "
+            f"(турниров: {record['played']}, побед: {record['won']}, рекорд: {record['best']})"
+        )
     
-    await update.message.reply_text(stats_text, parse_mode=ParseMode.HTML)
+    await update.message.reply_text("\n".join(lines), parse_mode=ParseMode.HTML)
 
-async def rules_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработчик команды /rules"""
-    rules_text = (
-        "📋 **ПРАВИЛА ТУРНИРА** 📋\n\n"
-        
-        "✅ **ЗАСЧИТЫВАЕТСЯ:**\n"
-        "• Только новые сообщения с 🎰\n"
-        "• Сообщения отправленные лично вами\n"
-        "• Сообщения младше 2 минут\n\n"
-        
-        "❌ **НЕ ЗАСЧИТЫВАЕТСЯ:**\n"
-        "• Пересланные сообщения (даже свои старые!)\n"
-        "• Сообщения из истории чата\n"
-        "• Сообщения старше 2 минут\n\n"
-        
-        "⚖️ **СИСТЕМА ЧЕСТНАЯ:**\n"
-        "• Автоматическая проверка каждого сообщения\n"
-        "• Определение пересланных сообщений\n"
-        "• Проверка времени отправки\n\n"
-        
-        "🎯 **ВЕРОЯТНОСТЬ ВЫИГРЫША:** 1/64 ≈ 1.56%\n\n"
-        
-        "🏆 **ПОБЕДИТЕЛЬ:** Игрок с наибольшим количеством 777\n"
-        "При равенстве очков - несколько победителей\n\n"
+async def me_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /me - личная статистика за все время"""
+    tournament_manager = get_tournament_manager(context)
+    user = update.effective_user
+    chat = update.effective_chat
+    
+    game, _ = split_game_args(context.args or [])
+    game = game or DEFAULT_GAME
+    
+    sections = []
+    if chat.type in ['group', 'supergroup']:
+        sections.append(("💬 В этом чате", chat.id))
+    sections.append(("🌍 Всего", None))
+    
+    lines = [f"📊 <b>Статистика {html.escape(user.first_name)}</b> {game}", ""]
+    for title, chat_id in sections:
+        record = tournament_manager.get_lifetime_stats(user.id, chat_id, game)
+        if not record:
+            lines.append(f"{title}: пока нет завершенных турниров")
+            continue
         
-        "❓ **Вопросы?** Обращайтесь к администратору чата!"
+        rank = tournament_manager.get_lifetime_rank(user.id, chat_id, game=game)
+        lines.append(f"<b>{title}:</b>")
+        lines.append(f"• {game} Всего {GAMES[game]['unit']}: {record['wins']}")
+        lines.append(f"• 🎮 Турниров сыграно: {record['played']}")
+        lines.append(f"• 🏆 Турниров выиграно: {record['won']}")
+        lines.append(f"• ⭐ Рекорд за турнир: {record['best']}")
+        if rank:
+            lines.append(f"• 📈 Место в топе: {rank}")
+        lines.append("")
+    
+    await update.message.reply_text("\n".join(lines).strip(), parse_mode=ParseMode.HTML)
+
+def format_fairness(users: Dict, chats: Dict, player_names: Dict[int, str]) -> str:
+    """Форматирует результаты analyze_histograms по игрокам и чатам"""
+    from utils.helpers import calculate_probability
+    
+    if not users['attempts']:
+        return "📭 Пока нет ни одного броска 🎰."
+    
+    _, hit_rate = calculate_probability(users['hits'], users['attempts'])
+    lines = [
+        "🎯 <b>АНАЛИЗ ЧЕСТНОСТИ БРОСКОВ</b> 🎯",
+        "",
+        f"• Бросков: {users['attempts']}, из них 777: {users['hits']} ({hit_rate}, ожидается 1.56%)",
+        f"• Хи-квадрат по всем броскам: {users['total_chi2']:.1f}, p = {users['total_p_value']:.4f}",
+        f"• Игроков: {users['subjects']}, с достаточной выборкой: {users['tested']}",
+        f"• Чатов: {chats['subjects']}, подозрительных: {len(chats['outliers'])}",
+        ""
+    ]
+    
+    if users['outliers']:
+        lines.append(f"⚠️ <b>Подозрительные игроки:</b> {len(users['outliers'])}")
+        for outlier in users['outliers'][:10]:
+            name = templates.display_name(outlier['id'], player_names)
+            _, rate = calculate_probability(outlier['hits'], outlier['attempts'])
+            lines.append(
+                f"• {name} (ID: <code>{outlier['id']}</code>): {outlier['hits']}/{outlier['attempts']} = {rate}, "
+                f"z = {outlier['hit_z']:.1f}, p = {outlier['p_value']:.2g}"
+            )
+    else:
+        lines.append("✅ Подозрительных игроков не найдено.")
+    
+    return "\n".join(lines)
+
+async def fairness_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /fairness - проверка честности бросков 🎰 (только для администратора)"""
+    tournament_manager = get_tournament_manager(context)
+    if update.effective_user.id != config.ADMIN_ID:
+        await update.message.reply_text("⛔ Только администратор!")
+        return
+    
+    try:
+        from utils.analytics import analyze_histograms
+    except ImportError:
+        await update.message.reply_text("⚠️ Для аналитики нужен пакет numpy.")
+        return
+    
+    # Анализ по копиям в отдельном потоке: броски продолжают считаться
+    user_rolls, chat_rolls = tournament_manager.roll_snapshot()
+    users = await asyncio.to_thread(analyze_histograms, user_rolls)
+    chats = await asyncio.to_thread(analyze_histograms, chat_rolls)
+    
+    await update.message.reply_text(
+        format_fairness(users, chats, tournament_manager.player_names),
+        parse_mode=ParseMode.HTML
     )
+
+def format_memory(report: List[Dict], rss: Optional[int], offloaded: int, evicted: int, rehydrated: int,
+                  evicted_now: Optional[Tuple[int, int]] = None, processes: int = 1) -> str:
+    """Форматирует отчет о памяти: report - chat_memory по чатам, rss - суммарный по процессам"""
+    from utils.memory import format_bytes
+    
+    lines = ["🧠 <b>ПАМЯТЬ БОТА</b> 🧠", ""]
+    if evicted_now is not None:
+        lines += [f"💤 Выгружено сейчас: {evicted_now[0]} чатов, ~{format_bytes(evicted_now[1])}", ""]
+    
+    report = sorted(report, key=lambda chat: chat['bytes'], reverse=True)
+    rss_label = "Процесс (RSS)" if processes == 1 else f"Процессы (RSS, {processes})"
+    lines += [
+        f"• {rss_label}: {format_bytes(rss) if rss is not None else 'н/д'}",
+        f"• Чатов в памяти: {len(report)}, состояние ~{format_bytes(sum(chat['bytes'] for chat in report))}",
+        f"• Выгружено на диск: {offloaded}",
+        f"• Выгрузок: {evicted}, возвратов: {rehydrated}",
+    ]
+    if config.CHAT_IDLE_TTL > 0:
+        lines.append(f"• Порог неактивности: {config.CHAT_IDLE_TTL // 3600} ч")
+    
+    if report:
+        lines += ["", "<b>Самые большие чаты:</b>"]
+        for chat in report[:10]:
+            title = html.escape(chat['title']) if chat['title'] else f"<code>{chat['chat_id']}</code>"
+            idle = f", без активности {int(chat['idle'] // 3600)} ч" if chat['idle'] is not None else ""
+            lines.append(
+                f"• {title}: {format_bytes(chat['bytes'])}, участников {chat['participants']}, "
+                f"турниров {chat['tournaments']}{idle}"
+            )
     
-    await update.message.reply_text(rules_text, parse_mode=ParseMode.HTML)
+    return "\n".join(lines)
 
-async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработчик команды /help"""
-    help_text = (
-        "🎰 **Бот для турниров по эмодзи 777** 🎰\n\n"
-        
-        "👑 **Команды для администратора:**\n"
-        "`/start [минуты]` - Начать турнир\n"
-        "`/stop` - Завершить турнир и показать результаты\n"
-        "`/stats` - Текущая статистика турнира\n"
-        "`/rules` - Правила турнира\n\n"
-        
-        "📋 **Важные правила:**\n"
-        "• Учитываются ТОЛЬКО свежие сообщения (<2 мин)\n"
-        "• Пересланные 🎰 НЕ засчитываются\n"
-        "• Система автоматически проверяет сообщения\n\n"
-        
-        "🎮 **Как работает турнир:**\n"
-        "1. Админ: `/start` - начинается турнир\n"
-        "2. Игроки: Отправляют 🎰 (только новые!)\n"
-        "3. Админ: `/stop` - турнир завершается\n"
-        "4. Бот: Определяет победителя\n\n"
-        
-        "🎯 **Вероятность 777:** 1/64 ≈ 1.56%\n"
-        "📊 **Ваша статистика:** 1/105 ≈ 0.95% (менее удачливый)\n\n"
-        
-        "➕ **Добавьте бота в группу и дайте права администратора!**"
+async def memory_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /memory [evict] - память по чатам и выгрузка неактивных (только для администратора)"""
+    tournament_manager = get_tournament_manager(context)
+    if update.effective_user.id != config.ADMIN_ID:
+        await update.message.reply_text("⛔ Только администратор!")
+        return
+    
+    from utils.eviction import evict_idle_chats
+    from utils.memory import process_rss
+    
+    evicted_now = None
+    if context.args and context.args[0].lower() == 'evict':
+        if not tournament_manager.offload_dir or config.CHAT_IDLE_TTL <= 0:
+            await update.message.reply_text("⚠️ Выгрузка чатов выключена (CHAT_IDLE_TTL=0).")
+            return
+        evicted_now = await evict_idle_chats(tournament_manager, config.CHAT_IDLE_TTL)
+    
+    await update.message.reply_text(
+        format_memory(
+            tournament_manager.memory_report(), process_rss(), tournament_manager.offloaded_count,
+            tournament_manager.evicted, tournament_manager.rehydrated, evicted_now
+        ),
+        parse_mode=ParseMode.HTML
     )
+
+def format_active_tournaments(tournaments: List[Dict]) -> str:
+    """Форматирует список активных турниров для администратора"""
+    if not tournaments:
+        return "📭 Сейчас нет активных турниров."
+    
+    now = datetime.now()
+    lines = [f"🎰 <b>АКТИВНЫЕ ТУРНИРЫ:</b> {len(tournaments)}\n"]
+    
+    for tournament in sorted(tournaments, key=lambda t: t['start_time']):
+        minutes = int((now - tournament['start_time']).total_seconds() // 60)
+        lines.append(
+            f"• {tournament['game']} {html.escape(tournament['chat_title'] or '')} (ID: <code>{tournament['chat_id']}</code>) - "
+            f"{minutes} мин, {GAMES[tournament['game']]['unit']}: {tournament['message_count']}"
+        )
     
-    await update.message.reply_text(help_text, parse_mode=ParseMode.HTML)
+    return "\n".join(lines)
 
-# ========== АКТИВАЦИЯ/ДЕАКТИВАЦИЯ БОТА ==========
+async def tournaments_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /tournaments - все активные турниры (только для администратора)"""
+    tournament_manager = get_tournament_manager(context)
+    if update.effective_user.id != config.ADMIN_ID:
+        await update.message.reply_text("⛔ Только администратор!")
+        return
+    
+    await update.message.reply_text(
+        format_active_tournaments(tournament_manager.get_all_active_tournaments()),
+        parse_mode=ParseMode.HTML
+    )
+
+async def rules_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /rules"""
+    await update.message.reply_text(templates.RULES_TEXT, parse_mode=ParseMode.HTML)
+
+async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /help"""
+    await update.message.reply_text(templates.HELP_TEXT, parse_mode=ParseMode.HTML)
+
+# ========== АКТИВАЦИЯ/ДЕАКТИВАЦИЯ И НАСТРОЙКИ ЧАТА ==========
+
+async def settings_scope(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Tuple[bool, Optional[int]]:
+    """Чьи настройки меняет команда: (разрешено, chat_id или None для общих)
+
+    В группе - настройки этой группы (админ чата), в личке - общие (только ADMIN_ID).
+    """
+    chat = update.effective_chat
+    if chat.type == 'private':
+        return update.effective_user.id == config.ADMIN_ID, None
+    return await is_chat_admin(update, context), chat.id
 
 async def active_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Команда /active - включить бота"""
-    from config import config
-    
-    if update.effective_user.id == config.ADMIN_ID:
-        config.BOT_ACTIVE = True
-        await update.message.reply_text(
-            "✅ **Бот включен!**\n"
-            "Теперь я реагирую на 🎰 и команды.",
-            parse_mode="HTML"
-        )
-    else:
+    """Команда /active - включить бота в чате (в личке - во всех чатах по умолчанию)"""
+    allowed, chat_id = await settings_scope(update, context)
+    if not allowed:
         await update.message.reply_text("⛔ Только администратор!")
+        return
+    
+    await get_chat_settings(context).set(chat_id, {'active': True})
+    await update.message.reply_text(
+        "✅ <b>Бот включен!</b>\n"
+        + ("Теперь я реагирую на броски в этом чате." if chat_id else "Это значение по умолчанию для всех чатов."),
+        parse_mode="HTML"
+    )
 
 async def inactive_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Команда /inactive - выключить бота"""
-    from config import config
+    """Команда /inactive - выключить бота в чате (в личке - во всех чатах по умолчанию)"""
+    allowed, chat_id = await settings_scope(update, context)
+    if not allowed:
+        await update.message.reply_text("⛔ Только администратор!")
+        return
     
-    if update.effective_user.id == config.ADMIN_ID:
-        config.BOT_ACTIVE = False
-        await update.message.reply_text(
-            "⏸️ **Бот выключен!**\n"
-            "Не реагирую на 🎰 до команды /active.",
-            parse_mode="HTML"
-        )
-    else:
+    await get_chat_settings(context).set(chat_id, {'active': False})
+    await update.message.reply_text(
+        "⏸️ <b>Бот выключен!</b>\n"
+        + ("Не реагирую на броски в этом чате до команды /active." if chat_id
+           else "Это значение по умолчанию для всех чатов без своей настройки."),
+        parse_mode="HTML"
+    )
+
+def format_settings(chat_settings: ChatSettingsStore, chat_id: Optional[int]) -> str:
+    """Текущие настройки чата; переопределенные отмечены звездочкой"""
+    settings = chat_settings.defaults if chat_id is None else chat_settings.get(chat_id)
+    overridden = chat_settings.overrides(chat_id)
+    
+    lines = ["⚙️ <b>Общие настройки:</b>" if chat_id is None else "⚙️ <b>Настройки чата:</b>", ""]
+    for name, (kind, _, _, description) in SETTINGS.items():
+        value = getattr(settings, name)
+        if kind is bool:
+            value = "on" if value else "off"
+        mark = " *" if name in overridden else ""
+        lines.append(f"• <code>{name}</code> = <b>{value}</b>{mark} - {description}")
+    
+    lines.append("")
+    lines.append("Изменить: <code>/settings имя значение</code>, сбросить: <code>/settings reset</code>")
+    return "\n".join(lines)
+
+async def settings_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /settings [имя значение | reset] - настройки чата"""
+    allowed, chat_id = await settings_scope(update, context)
+    if not allowed:
+        await update.message.reply_text("⛔ Только администратор!")
+        return
+    
+    chat_settings = get_chat_settings(context)
+    args = context.args or []
+    try:
+        if len(args) == 1 and args[0].lower() == 'reset':
+            await chat_settings.reset(chat_id)
+        elif len(args) == 2:
+            await chat_settings.set(chat_id, {args[0].lower(): args[1]})
+        elif args:
+            raise ValueError("используйте /settings имя значение")
+    except ValueError as e:
+        await update.message.reply_text(f"⚠️ {html.escape(str(e))}", parse_mode=ParseMode.HTML)
+        return
+    except OSError as e:
+        await update.message.reply_text(f"❌ Настройка применена, но не сохранена в файл: {html.escape(str(e))}",
+                                        parse_mode=ParseMode.HTML)
+    
+    await update.message.reply_text(format_settings(chat_settings, chat_id), parse_mode=ParseMode.HTML)
+
+async def netstats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Команда /netstats - метрики пулов HTTP-соединений"""
+    if update.effective_user.id != config.ADMIN_ID:
         await update.message.reply_text("⛔ Только администратор!")
+        return
+    
+    from utils.request import format_pool_metrics
+    
+    requests = context.bot_data.get('http_requests', [])
+    if not requests:
+        await update.message.reply_text("📭 Метрики пулов недоступны.")
+        return
+    
+    await update.message.reply_text(
+        "\n\n".join(format_pool_metrics(request) for request in requests),
+        parse_mode=ParseMode.HTML
+    )
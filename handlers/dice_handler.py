@@ -3,20 +3,43 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
 import asyncio
+from typing import Dict, Tuple
 
 from config import config
-from database import tournament_manager
+from database import get_tournament_manager
+from utils.ratelimit import TokenBucketLimiter
+from utils import templates
+from utils.scoring import DEFAULT_GAME, GAMES, score_roll
+from utils.chat_settings import get_chat_settings
+
+# Ограничение частоты бросков для каждой пары (чат, игрок)
+flood_limiter = TokenBucketLimiter(
+    rate=config.FLOOD_RATE,
+    burst=config.FLOOD_BURST,
+    warn_window=config.FLOOD_WARN_WINDOW,
+    idle_ttl=config.FLOOD_IDLE_TTL
+)
+
+def get_flood_limiter(context) -> TokenBucketLimiter:
+    """Лимитер бота: в мультибот-режиме свой у каждого бота в bot_data
+
+    Иначе два бота в одной группе тратили бы на каждый бросок два токена игрока.
+    """
+    return context.bot_data.get('flood_limiter', flood_limiter)
+
+# Поздравления, ожидающие объединения: (bot_id, chat_id) -> {(user_id, игра): (упоминание, счет)}
+pending_hits: Dict[Tuple[int, int], Dict[Tuple[int, str], Tuple[str, int]]] = {}
 
 class DiceChecker:
-    """Проверка эмодзи 🎰 и сообщений"""
+    """Проверка бросков и сообщений"""
     
     @staticmethod
     def is_777(dice_emoji: str, dice_value: int) -> bool:
         """Проверяет, выпало ли 777"""
-        return dice_emoji == "🎰" and dice_value == 64
+        return dice_emoji == DEFAULT_GAME and score_roll(dice_emoji, dice_value) > 0
     
     @staticmethod
-    def is_forwarded_or_old_message(message) -> tuple[bool, str]:
+    def is_forwarded_or_old_message(message, age_limit: int = None) -> tuple[bool, str]:
         """Проверяет, является ли сообщение пересланным или старым"""
         
         # Проверяем признаки пересылки Telegram
@@ -41,33 +64,53 @@ class DiceChecker:
             current_time = datetime.now(message_time.tzinfo)
             age_seconds = (current_time - message_time).total_seconds()
             
-            if age_seconds > config.MESSAGE_AGE_LIMIT:
+            if age_seconds > (age_limit or config.MESSAGE_AGE_LIMIT):
                 return True, f"Сообщение старое ({int(age_seconds/60)} минут назад)"
         
         return False, "Оригинальное сообщение"
 
 async def handle_dice_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработчик сообщений с эмодзи 🎰"""
+    """Обработчик бросков: 🎰 и остальные игры по таблице очков"""
+    
+    # filters.Dice пропускает и посты каналов: там нет сообщения от игрока
+    message = update.effective_message
+    if message is None or message.from_user is None:
+        return
+    tournament_manager = get_tournament_manager(context)
     
-    # ========== ПРОВЕРКА АКТИВНОСТИ БОТА ==========
-    if not config.BOT_ACTIVE:
-        return  # БОТ ВЫКЛЮЧЕН - ВЫХОДИМ
-    # ==============================================
+    # ========== ПРОВЕРКА АКТИВНОСТИ БОТА В ЧАТЕ ==========
+    settings = get_chat_settings(context).get(message.chat_id)
+    if not settings.active:
+        return  # БОТ ВЫКЛЮЧЕН В ЭТОМ ЧАТЕ - ВЫХОДИМ
+    # =====================================================
     
     try:
-        message = update.message
+        # Флуд-контроль: лишние броски игнорируем без обращений к API.
+        # Пауза между бросками в настройках чата заменяет общий лимит
+        if settings.cooldown:
+            allowed, should_warn = get_flood_limiter(context).check(
+                message.chat_id, message.from_user.id, rate=1 / settings.cooldown, burst=1
+            )
+        else:
+            allowed, should_warn = get_flood_limiter(context).check(message.chat_id, message.from_user.id)
+        if not allowed:
+            if should_warn:
+                await message.reply_text(
+                    templates.FLOOD_WARNING.format(mention=message.from_user.mention_html()),
+                    parse_mode=ParseMode.HTML
+                )
+            return
         
         # Проверяем, не является ли сообщение пересланным или старым
-        is_invalid, reason = DiceChecker.is_forwarded_or_old_message(message)
+        is_invalid, reason = DiceChecker.is_forwarded_or_old_message(message, settings.age_limit)
         
         if is_invalid:
-            # Если это 777, но сообщение невалидное - отправляем предупреждение
-            if hasattr(message, 'dice') and message.dice:
-                if DiceChecker.is_777(message.dice.emoji, message.dice.value):
+            # Если бросок принес бы очки, но сообщение невалидное - отправляем предупреждение
+            dice = message.dice
+            if dice and score_roll(dice.emoji, dice.value) > 0:
+                if dice.emoji == DEFAULT_GAME or tournament_manager.is_tournament_active(message.chat_id, dice.emoji):
                     warning = await message.reply_text(
-                        f"⚠️ {message.from_user.mention_html()}, это сообщение не учитывается!\n"
-                        f"Причина: {reason}\n\n"
-                        f"📌 Отправьте новый 🎰 для участия!",
+                        templates.INVALID_ROLL.format(mention=message.from_user.mention_html(), reason=reason),
                         parse_mode=ParseMode.HTML
                     )
                     
@@ -80,43 +123,49 @@ async def handle_dice_message(update: Update, context: ContextTypes.DEFAULT_TYPE
             
             return
         
-        # Проверяем, что это эмодзи 🎰
+        # Проверяем, что это поддерживаемая игра
         dice = message.dice
-        if not dice or dice.emoji != "🎰":
+        if not dice or dice.emoji not in GAMES:
             return
         
         user = message.from_user
         chat = message.chat
+        game = dice.emoji
+        
+        # Учитываем каждый честный бросок 🎰 для аналитики
+        if game == DEFAULT_GAME:
+            tournament_manager.record_roll(chat.id, user.id, dice.value)
         
-        # Проверяем, выпало ли 777
-        if DiceChecker.is_777(dice.emoji, dice.value):
+        # Очки за бросок - одно обращение к таблице
+        points = score_roll(game, dice.value)
+        if points:
             
             # Турнирный режим
-            if tournament_manager.is_tournament_active(chat.id):
-                # Добавляем победу
-                tournament_manager.add_win(chat.id, user.id, user.first_name)
-                
-                # Получаем текущий счет
-                stats = tournament_manager.get_stats(chat.id)
-                current_score = next((score for uid, score in stats if uid == user.id), 0)
-                
-                # Отправляем поздравление
-                await message.reply_text(
-                    f"🎉 **ДЖЕКПОТ!** 🎉\n\n"
-                    f"Поздравляем, {user.mention_html()}! 🎰\n\n"
-                    f"✅ **Засчитано в турнире!**\n"
-                    f"📊 Текущий счет: {current_score} 🎰\n\n"
-                    f"Продолжайте в том же духе!",
-                    parse_mode=ParseMode.HTML
+            if tournament_manager.is_tournament_active(chat.id, game):
+                # Добавляем очки (имя сохраняем для рейтингов без get_chat)
+                tournament_manager.add_win(
+                    chat.id, user.id, f"@{user.username}" if user.username else user.first_name,
+                    game=game, points=points
                 )
+                
+                # Поздравляем только в играх, где очко - редкость
+                if GAMES[game]['announce']:
+                    current_score = tournament_manager.get_player_score(chat.id, user.id, game)
+                    if settings.coalesce:
+                        queue_hit(context, chat.id, user, game, current_score, settings.coalesce)
+                    else:
+                        await message.reply_text(
+                            templates.JACKPOT_TOURNAMENT.format(
+                                title=GAMES[game]['title'], mention=user.mention_html(),
+                                emoji=game, score=current_score
+                            ),
+                            parse_mode=ParseMode.HTML
+                        )
             
-            else:
+            elif DiceChecker.is_777(game, dice.value):
                 # Обычный режим (без турнира)
                 congrats_message = await message.reply_text(
-                    f"🎉 **ДЖЕКПОТ!** 🎉\n\n"
-                    f"Поздравляем, {user.mention_html()}! 🎰\n\n"
-                    f"💰 **ВЫИГРЫШ!** 💰\n\n"
-                    f"Администратор свяжется с вами для получения награды!",
+                    templates.JACKPOT_FREE.format(mention=user.mention_html()),
                     parse_mode=ParseMode.HTML
                 )
                 
@@ -126,6 +175,35 @@ async def handle_dice_message(update: Update, context: ContextTypes.DEFAULT_TYPE
     except Exception as e:
         print(f"Ошибка обработки эмодзи: {e}")
 
+def queue_hit(context, chat_id: int, user, game: str, score: int, window: float):
+    """Копит поздравления чата и отправляет их одним сообщением по окончании окна"""
+    key = (context.bot.id, chat_id)
+    hits = pending_hits.get(key)
+    if hits is not None:
+        hits[user.id, game] = (user.mention_html(), score)
+        return
+    
+    pending_hits[key] = {(user.id, game): (user.mention_html(), score)}
+    # Отдельная задача: обработка следующих обновлений не ждет окончания окна
+    context.application.create_task(flush_hits(context.bot, chat_id, window))
+
+async def flush_hits(bot, chat_id: int, window: float):
+    """Отправляет накопленные за окно поздравления"""
+    await asyncio.sleep(window)
+    hits = pending_hits.pop((bot.id, chat_id), {})
+    if not hits:
+        return
+    
+    lines = "\n".join(
+        templates.HIT_LINE.format(mention=mention, title=GAMES[game]['title'], emoji=game, score=score)
+        for (_, game), (mention, score) in hits.items()
+    )
+    try:
+        for text in templates.split_message(templates.HITS_COALESCED.format(seconds=int(window), lines=lines)):
+            await bot.send_message(chat_id=chat_id, text=text, parse_mode=ParseMode.HTML)
+    except Exception as e:
+        print(f"Ошибка отправки поздравлений: {e}")
+
 async def notify_admin_about_win(context, user, chat, congrats_message):
     """Уведомляет администратора о выигрыше"""
     try:
@@ -137,15 +215,14 @@ async def notify_admin_about_win(context, user, chat, congrats_message):
             message_link = f"https://t.me/c/{chat_id_str}/{congrats_message.message_id}"
         
         # Формируем сообщение админу
-        admin_message = (
-            f"🎰 **ВЫПАЛ ДЖЕКПОТ!** 🎰\n\n"
-            f"👤 **Игрок:** {user.mention_html()}\n"
-            f"🆔 ID: `{user.id}`\n"
-            f"📛 Имя: {user.first_name}\n"
-            f"📝 Юзернейм: @{user.username if user.username else 'нет'}\n\n"
-            f"💬 **Чат:** {chat.title if hasattr(chat, 'title') else 'Личный'}\n"
-            f"🔗 **Ссылка:** {message_link}\n"
-            f"⏰ **Время:** {congrats_message.date.strftime('%H:%M:%S')}"
+        admin_message = templates.JACKPOT_ADMIN.format(
+            mention=user.mention_html(),
+            user_id=user.id,
+            first_name=templates.escape_name(user.id, user.first_name),
+            username=user.username if user.username else 'нет',
+            chat_title=templates.escape_name(chat.id, chat.title) if chat.title else 'Личный',
+            link=message_link,
+            time=congrats_message.date.strftime('%H:%M:%S')
         )
         
         # Создаем кнопки
@@ -1,24 +0,0 @@
-from .commands import (
-    start_command,
-    stop_command,
-    stats_command,
-    rules_command,
-    help_command
-)
-
-from .dice_handler import (
-    handle_dice_message,
-    DiceChecker,
-    notify_admin_about_win
-)
-
-__all__ = [
-    'start_command',
-    'stop_command',
-    'stats_command', 
-    'rules_command',
-    'help_command',
-    'handle_dice_message',
-    'DiceChecker',
-    'notify_admin_about_win'
-]
@@ -0,0 +1,22 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from utils.admins import admin_cache
+
+async def handle_chat_member_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обновляет кэш администраторов при изменении прав участников"""
+    
+    # Права самого бота поменялись - список админов перечитаем при следующей команде
+    if update.my_chat_member:
+        admin_cache.invalidate(update.my_chat_member.chat.id)
+        return
+    
+    member_update = update.chat_member
+    if not member_update:
+        return
+    
+    admin_cache.apply_member_status(
+        member_update.chat.id,
+        member_update.new_chat_member.user.id,
+        member_update.new_chat_member.status
+    )
@@ -4,18 +4,37 @@
 Запуск: python main.py
 """
 
+import time
+
+# Отсчет времени запуска - до всех тяжелых импортов
+PROCESS_STARTED = time.perf_counter()
+
+import argparse
+import asyncio
 import logging
 import sys
 import signal
-from telegram.ext import Application, CommandHandler, MessageHandler, filters
+from telegram import Update
+from telegram.ext import (
+    Application, CallbackQueryHandler, ChatMemberHandler, CommandHandler, MessageHandler, TypeHandler, filters
+)
 
 # Импортируем наши модули
 from config import config
 from handlers.commands import (
     start_command, stop_command, stats_command, 
-    rules_command, help_command, active_command, inactive_command
+    rules_command, help_command, active_command, inactive_command,
+    netstats_command, tournaments_command, top_command, me_command,
+    fairness_command, settings_command, memory_command
 )
+from handlers.activity import track_chat_activity
 from handlers.dice_handler import handle_dice_message
+from handlers.member_handler import handle_chat_member_update
+from handlers.callbacks import leaderboard_callback
+from utils.request import build_requests
+from utils.chat_settings import chat_settings
+from utils.eviction import attach_offload, start_eviction
+from utils.startup import StartupTimer, Warmup
 
 # Настройка логирования
 logging.basicConfig(
@@ -37,43 +56,191 @@ def signal_handler(signum, frame):
     logger.info(f"Получен сигнал {signum}, завершаем работу...")
     sys.exit(0)
 
+def register_handlers(application: Application):
+    """Регистрирует обработчики команд и эмодзи"""
+    # Активность чатов и возврат выгруженных - раньше всех остальных обработчиков
+    application.add_handler(TypeHandler(Update, track_chat_activity), group=-999)
+    
+    # Добавляем обработчики команд
+    application.add_handler(CommandHandler("start", start_command))
+    application.add_handler(CommandHandler("stop", stop_command))
+    application.add_handler(CommandHandler("stats", stats_command))
+    application.add_handler(CommandHandler("rules", rules_command))
+    application.add_handler(CommandHandler("help", help_command))
+    application.add_handler(CommandHandler("about", help_command))
+    application.add_handler(CommandHandler("top", top_command))
+    application.add_handler(CommandHandler("me", me_command))
+    
+    # Добавляем новые команды для активации/деактивации
+    application.add_handler(CommandHandler("active", active_command))
+    application.add_handler(CommandHandler("inactive", inactive_command))
+    application.add_handler(CommandHandler("settings", settings_command))
+    application.add_handler(CommandHandler("netstats", netstats_command))
+    application.add_handler(CommandHandler("tournaments", tournaments_command))
+    application.add_handler(CommandHandler("fairness", fairness_command))
+    application.add_handler(CommandHandler("memory", memory_command))
+    
+    # Добавляем обработчик эмодзи 🎰
+    application.add_handler(MessageHandler(filters.Dice.ALL, handle_dice_message))
+    
+    # Листание рейтингов кнопками
+    application.add_handler(CallbackQueryHandler(leaderboard_callback, pattern=r"^lb:\d+:(\d+|me)$"))
+    
+    # Изменения прав участников обновляют кэш администраторов
+    application.add_handler(ChatMemberHandler(handle_chat_member_update, ChatMemberHandler.ANY_CHAT_MEMBER))
+
+def load_chat_settings():
+    """Настройки чатов из файла (при ошибке - значения из окружения)"""
+    try:
+        chat_settings.load()
+    except (OSError, ValueError) as e:
+        logger.error(f"❌ Файл настроек чатов не прочитан: {e}")
+
+def load_state():
+    """История и накопительная статистика из резервной копии"""
+    from database import tournament_manager
+    if tournament_manager.load_from_file(config.STATE_FILE):
+        logger.info(f"💾 Загружено турниров из истории: {len(tournament_manager.tournament_history)}")
+    attach_offload(tournament_manager, config.OFFLOAD_DIR, config.CHAT_IDLE_TTL)
+    if tournament_manager.offloaded_count:
+        logger.info(f"💤 Выгруженных чатов на диске: {tournament_manager.offloaded_count}")
+
+async def mark_first_update(update: object, context):
+    """Отмечает время первого обновления после запуска (группа -1000, ничего не блокирует)"""
+    timer = context.bot_data.get('startup_timer')
+    if timer is not None and timer.mark_first_update():
+        logger.info(f"⏱️ Первое обновление через {timer.first_update * 1000:.0f} мс после старта")
+
+class TimedApplication(Application):
+    """Application, которое пишет отчет о запуске, как только начался polling
+
+    run_polling запускает updater до start(), поэтому конец start() - момент готовности.
+    """
+
+    async def start(self):
+        await super().start()
+        timer = self.bot_data.get('startup_timer')
+        if timer is not None and timer.ready is None:
+            timer.mark_ready()
+            logger.info(timer.report())
+
+async def on_startup(application: Application):
+    """post_init: фоновые службы, работающие в event loop бота"""
+    timer = application.bot_data.get('startup_timer')
+    if timer is not None:
+        timer.mark("инициализация бота (getMe)")
+        # Прогрев шел параллельно с сетью - обычно к этому моменту уже закончен
+        await asyncio.to_thread(application.bot_data.pop('warmup').join)
+        timer.mark("ожидание прогрева")
+    
+    chat_settings.install_reload_signal()
+    
+    from database import tournament_manager
+    application.bot_data['eviction_task'] = start_eviction(
+        tournament_manager, config.CHAT_IDLE_TTL, config.EVICT_INTERVAL, config.STATE_FILE
+    )
+    
+    # Локальный HTTP API поднимается и гасится вместе с приложением
+    if config.API_PORT:
+        from api_server import start_api
+        await start_api(application)
+
+async def on_shutdown(application: Application):
+    """post_shutdown: остановка фоновых служб и сохранение состояния"""
+    eviction_task = application.bot_data.get('eviction_task')
+    if eviction_task is not None:
+        eviction_task.cancel()
+    
+    if config.API_PORT:
+        from api_server import stop_api
+        await stop_api(application)
+    
+    from database import tournament_manager
+    try:
+        tournament_manager.save_to_file(config.STATE_FILE)
+    except OSError as e:
+        logger.error(f"❌ Не удалось сохранить состояние: {e}")
+
 def main():
-    """Основная функция запуска бота"""
+    """Основная функция запуска бота
+
+    Порядок запуска: импорты -> проверка конфигурации -> прогрев состояния в потоке
+    параллельно со сборкой приложения и getMe -> polling. Время фаз пишется в лог.
+    """
+    timer = StartupTimer(PROCESS_STARTED)
+    timer.mark("импорты")
+    
+    parser = argparse.ArgumentParser(description="Бот для турниров 777")
+    parser.add_argument('--bots', default=config.BOTS_FILE, help="JSON-файл со списком ботов (мультибот-режим)")
+    args = parser.parse_args()
+    
+    config.BOTS_FILE = args.bots
+    if not config.validate():
+        sys.exit(1)
+    timer.mark("конфигурация")
     
     # Регистрируем обработчики сигналов
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
+    # Мультибот-режим: несколько токенов в одном процессе и event loop
+    if args.bots:
+        from multibot import run_multibot
+        try:
+            run_multibot(args.bots)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Не удалось запустить ботов из {args.bots}: {e}")
+            sys.exit(1)
+        return
+    
+    # Многопроцессный режим: чаты распределяются по воркерам
+    if config.SHARD_WORKERS > 1:
+        load_chat_settings()
+        from sharding import run_sharded
+        run_sharded(config.SHARD_WORKERS)
+        return
+    
+    # Состояние читается с диска в потоке, пока основной поток собирает приложение и ходит в сеть
+    warmup = Warmup(timer, [
+        ("прогрев: настройки чатов", load_chat_settings),
+        ("прогрев: резервная копия турниров", load_state),
+    ]).start()
+    
     try:
-        # Создаем приложение
-        application = Application.builder().token(config.BOT_TOKEN).build()
-        
-        # Добавляем обработчики команд
-        application.add_handler(CommandHandler("start", start_command))
-        application.add_handler(CommandHandler("stop", stop_command))
-        application.add_handler(CommandHandler("stats", stats_command))
-        application.add_handler(CommandHandler("rules", rules_command))
-        application.add_handler(CommandHandler("help", help_command))
-        application.add_handler(CommandHandler("about", help_command))
+        # Отдельные пулы соединений: long polling не мешает ответам в чаты
+        api_request, updates_request = build_requests(config)
         
-        # Добавляем новые команды для активации/деактивации
-        application.add_handler(CommandHandler("active", active_command))
-        application.add_handler(CommandHandler("inactive", inactive_command))
+        # Создаем приложение
+        builder = (
+            Application.builder()
+            .application_class(TimedApplication)
+            .token(config.BOT_TOKEN)
+            .request(api_request)
+            .get_updates_request(updates_request)
+            .post_init(on_startup)
+            .post_shutdown(on_shutdown)
+        )
+        application = builder.build()
+        application.bot_data['http_requests'] = [api_request, updates_request]
+        application.bot_data['startup_timer'] = timer
+        application.bot_data['warmup'] = warmup
         
-        # Добавляем обработчик эмодзи 🎰
-        application.add_handler(MessageHandler(filters.Dice.ALL, handle_dice_message))
+        application.add_handler(TypeHandler(Update, mark_first_update), group=-1000)
+        register_handlers(application)
+        timer.mark("сборка приложения")
         
         # Запускаем бота
         logger.info("🎰 БОТ ДЛЯ ТУРНИРОВ 777 ЗАПУЩЕН!")
         logger.info(f"👑 ID администратора: {config.ADMIN_ID}")
-        logger.info(f"📊 Максимальная длительность турнира: {config.MAX_TOURNAMENT_DURATION} мин")
-        logger.info(f"⏰ Лимит сообщений: {config.MESSAGE_AGE_LIMIT} сек")
-        logger.info(f"🔌 Статус бота: {'АКТИВЕН' if config.BOT_ACTIVE else 'ВЫКЛЮЧЕН'}")
+        logger.info(f"🔌 Пул HTTP: {config.HTTP_POOL_SIZE} соединений, get_updates: {config.UPDATES_POOL_SIZE}, HTTP/{config.HTTP_VERSION}")
+        if config.API_PORT:
+            logger.info(f"🌐 HTTP API: {config.API_HOST}:{config.API_PORT}")
         logger.info("⏳ Ожидание сообщений...")
         
         # Упрощенный запуск
         application.run_polling(
-            drop_pending_updates=True
+            drop_pending_updates=True,
+            allowed_updates=Update.ALL_TYPES  # нужны chat_member для кэша админов
         )
         
     except Exception as e:
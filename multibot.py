@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+🎰 Мультибот-режим: несколько токенов в одном процессе
+
+Все боты работают в одном event loop и делят пулы HTTP-соединений, логи и
+метрики пулов. Турниры у каждого бота свои: TournamentManager лежит в
+bot_data['tournament_manager'], обработчики берут его через get_tournament_manager.
+Резервная копия тоже своя: STATE_FILE с именем бота (tournaments_backup.main.json).
+Настройки чатов и флуд-контроль у ботов раздельные: /inactive через одного бота
+не выключает другого в той же группе (файл chat_settings.main.json).
+
+Файл ботов (BOTS_FILE или python main.py --bots bots.json):
+    [
+        {"name": "main", "token": "123:abc"},
+        {"name": "brand", "token": "456:def", "api_port": 8081}
+    ]
+"""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+from typing import Dict, List
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+def load_bot_configs(filename: str) -> List[Dict]:
+    """Читает и проверяет список ботов"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        bots = json.load(f)
+
+    if not isinstance(bots, list) or not bots:
+        raise ValueError("файл ботов должен содержать непустой список")
+
+    names = set()
+    for index, bot in enumerate(bots):
+        if not isinstance(bot, dict) or not bot.get('token'):
+            raise ValueError(f"бот #{index + 1}: не указан token")
+        bot.setdefault('name', f"bot{index + 1}")
+        if bot['name'] in names:
+            raise ValueError(f"имя бота {bot['name']} повторяется")
+        names.add(bot['name'])
+        bot['api_port'] = int(bot.get('api_port', 0))
+
+    return bots
+
+def bot_file(filename: str, name: str) -> str:
+    """Файл бота: имя бота перед расширением (tournaments_backup.main.json)"""
+    base, ext = os.path.splitext(filename)
+    return f"{base}.{name}{ext}"
+
+def state_file_for(name: str) -> str:
+    """Резервная копия бота"""
+    return bot_file(config.STATE_FILE, name)
+
+def build_applications(bots: List[Dict]) -> List:
+    """Создает по Application на бота с общими пулами соединений"""
+    from telegram.ext import Application
+    from database import TournamentManager
+    from main import register_handlers
+    from utils.chat_settings import ChatSettingsStore, default_settings
+    from utils.ratelimit import TokenBucketLimiter
+    from utils.request import build_requests
+
+    api_request, updates_request = build_requests(config, bots=len(bots))
+
+    applications = []
+    for bot in bots:
+        application = (
+            Application.builder()
+            .token(bot['token'])
+            .request(api_request)
+            .get_updates_request(updates_request)
+            .build()
+        )
+        application.bot_data['bot_name'] = bot['name']
+        application.bot_data['bot_config'] = bot
+        application.bot_data['tournament_manager'] = TournamentManager(namespace=bot['name'])
+        application.bot_data['state_file'] = state_file_for(bot['name'])
+        application.bot_data['chat_settings'] = ChatSettingsStore(
+            default_settings(), bot_file(config.CHAT_SETTINGS_FILE, bot['name'])
+        )
+        application.bot_data['flood_limiter'] = TokenBucketLimiter(
+            rate=config.FLOOD_RATE,
+            burst=config.FLOOD_BURST,
+            warn_window=config.FLOOD_WARN_WINDOW,
+            idle_ttl=config.FLOOD_IDLE_TTL
+        )
+        application.bot_data['http_requests'] = [api_request, updates_request]
+        register_handlers(application)
+        applications.append(application)
+
+    return applications
+
+async def run_bots(bots: List[Dict]):
+    """Запускает всех ботов в текущем event loop и ждет сигнала остановки"""
+    from telegram import Update
+    from utils.chat_settings import install_reload_signal
+    from utils.eviction import attach_offload, start_eviction
+
+    applications = build_applications(bots)
+
+    # Состояние каждого бота - своя резервная копия и свой подкаталог выгруженных чатов
+    for application in applications:
+        try:
+            application.bot_data['chat_settings'].load()
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ {application.bot_data['bot_name']}: файл настроек чатов не прочитан: {e}")
+        manager = application.bot_data['tournament_manager']
+        if manager.load_from_file(application.bot_data['state_file']):
+            logger.info(f"💾 {application.bot_data['bot_name']}: загружено турниров из истории: "
+                        f"{len(manager.tournament_history)}")
+        attach_offload(
+            manager,
+            os.path.join(config.OFFLOAD_DIR, application.bot_data['bot_name']),
+            config.CHAT_IDLE_TTL
+        )
+
+    # Ботов инициализируем параллельно: get_me всех токенов идут одновременно
+    await asyncio.gather(*(application.initialize() for application in applications))
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    install_reload_signal(application.bot_data['chat_settings'] for application in applications)
+
+    started = []
+    try:
+        for application in applications:
+            await application.updater.start_polling(
+                drop_pending_updates=True,
+                allowed_updates=Update.ALL_TYPES  # нужны chat_member для кэша админов
+            )
+            await application.start()
+            started.append(application)
+            application.bot_data['eviction_task'] = start_eviction(
+                application.bot_data['tournament_manager'], config.CHAT_IDLE_TTL, config.EVICT_INTERVAL,
+                application.bot_data['state_file']
+            )
+
+            api_port = application.bot_data['bot_config']['api_port']
+            if api_port:
+                from api_server import start_api
+                await start_api(application, port=api_port)
+
+            logger.info(f"🤖 Бот {application.bot_data['bot_name']} (@{application.bot.username}) запущен")
+
+        logger.info(f"⏳ Ботов в процессе: {len(applications)}, ожидание сообщений...")
+        await stop.wait()
+    finally:
+        logger.info("🛑 Останавливаем ботов...")
+        from api_server import stop_api
+        for application in started:
+            eviction_task = application.bot_data.get('eviction_task')
+            if eviction_task is not None:
+                eviction_task.cancel()
+            await stop_api(application)
+            await application.updater.stop()
+            await application.stop()
+
+        # Пулы общие: закрываем их только после остановки всех ботов
+        for application in applications:
+            await application.shutdown()
+            try:
+                application.bot_data['tournament_manager'].save_to_file(application.bot_data['state_file'])
+            except OSError as e:
+                logger.error(f"❌ Не удалось сохранить состояние {application.bot_data['bot_name']}: {e}")
+
+def run_multibot(filename: str):
+    """Точка входа мультибот-режима"""
+    bots = load_bot_configs(filename)
+    logger.info(f"🤖 Мультибот-режим: {', '.join(bot['name'] for bot in bots)}")
+    asyncio.run(run_bots(bots))
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+🎰 Многопроцессный режим: чаты распределяются по воркерам по chat_id
+
+Процесс-приемник получает обновления и отправляет их в очередь воркера
+abs(chat_id) % N. Каждый воркер владеет своей частью TournamentManager,
+админские сводки собираются со всех воркеров. Резервная копия у каждого
+воркера своя (tournaments_backup.shard0.json): при смене числа воркеров
+чаты попадут в другие шарды, поэтому SHARD_WORKERS между запусками не меняют.
+
+Локальная проверка без сети:
+    BOT_TOKEN=0:offline python sharding.py --fake 10000 --workers 4
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Ключи обновлений, в которых чат лежит в поле 'chat'
+CHAT_UPDATE_KEYS = (
+    'message', 'edited_message', 'channel_post', 'edited_channel_post',
+    'my_chat_member', 'chat_member', 'chat_join_request'
+)
+
+def shard_for(chat_id: int, shards: int) -> int:
+    """Возвращает номер воркера для чата"""
+    return abs(chat_id) % shards
+
+def extract_chat_id(data: Dict) -> Optional[int]:
+    """Достает chat_id из сырого обновления"""
+    for key in CHAT_UPDATE_KEYS:
+        if key in data:
+            return data[key]['chat']['id']
+
+    callback = data.get('callback_query')
+    if callback and callback.get('message'):
+        return callback['message']['chat']['id']
+
+    return None
+
+async def answer_query(name: str, shard_id: int):
+    """Отвечает на админский запрос по данным своего шарда"""
+    from database import tournament_manager
+
+    if name == 'active_tournaments':
+        return [dict(t) for t in tournament_manager.get_all_active_tournaments()]
+
+    if name == 'summary':
+        # Очки разных игр не складываем: у 🎲 это сумма кубиков, а не попадания
+        points: Dict[str, int] = {}
+        for (_, game), stats in tournament_manager.player_stats.items():
+            points[game] = points.get(game, 0) + sum(stats.values())
+        return {
+            'shard': shard_id,
+            'active': len(tournament_manager.get_all_active_tournaments()),
+            'players': sum(len(stats) for stats in tournament_manager.player_stats.values()),
+            'points': points
+        }
+
+    if name == 'fairness':
+        # Гистограммы целиком: игрок может бросать в чатах разных шардов, анализ - после сложения
+        users, chats = tournament_manager.roll_snapshot()
+        return {
+            'users': users,
+            'chats': chats,
+            'names': {user_id: tournament_manager.player_names[user_id]
+                      for user_id in users if user_id in tournament_manager.player_names}
+        }
+
+    if name in ('memory', 'memory_evict'):
+        from utils.eviction import evict_idle_chats
+        from utils.memory import process_rss
+
+        evicted_now = None
+        if name == 'memory_evict' and tournament_manager.offload_dir and config.CHAT_IDLE_TTL > 0:
+            evicted_now = await evict_idle_chats(tournament_manager, config.CHAT_IDLE_TTL)
+        return {
+            'report': tournament_manager.memory_report(),
+            'rss': process_rss(),
+            'offloaded': tournament_manager.offloaded_count,
+            'evicted': tournament_manager.evicted,
+            'rehydrated': tournament_manager.rehydrated,
+            'evicted_now': evicted_now
+        }
+
+    raise ValueError(f"Неизвестный запрос: {name}")
+
+def shard_state_file(shard_id: int) -> str:
+    """Резервная копия воркера: STATE_FILE с номером шарда"""
+    base, ext = os.path.splitext(config.STATE_FILE)
+    return f"{base}.shard{shard_id}{ext}"
+
+async def _run_worker(shard_id: int, token: str, updates, results, offline: bool):
+    """Цикл воркера: обрабатывает обновления своего шарда"""
+    from telegram import Update
+    from telegram.ext import Application
+    from database import tournament_manager
+    from main import register_handlers
+    from utils.chat_settings import chat_settings
+    from utils.eviction import attach_offload, start_eviction
+
+    builder = Application.builder().token(token).updater(None)
+    if offline:
+        from fake_updates import OfflineRequest
+        builder = builder.request(OfflineRequest())
+    else:
+        from utils.request import build_requests
+        api_request, _ = build_requests(config)
+        builder = builder.request(api_request)
+
+    application = builder.build()
+    if not offline:
+        # /netstats воркера показывает пул его запросов к API
+        application.bot_data['http_requests'] = [api_request]
+    register_handlers(application)
+
+    # В фейковом прогоне состояние не читаем и не пишем, чаты не выгружаем: это замер, а не работа бота
+    state_file = None if offline else shard_state_file(shard_id)
+    if state_file and tournament_manager.load_from_file(state_file):
+        logger.info(f"💾 Воркер {shard_id}: загружено турниров из истории: {len(tournament_manager.tournament_history)}")
+
+    loop = asyncio.get_running_loop()
+    async with application:
+        await application.start()
+        # SIGHUP воркеру перечитывает настройки чатов; приемник пересылает его всем воркерам
+        chat_settings.install_reload_signal()
+        eviction_task = None
+        if not offline:
+            # Каталог выгрузки общий: чат всегда обрабатывает один и тот же воркер
+            attach_offload(tournament_manager, config.OFFLOAD_DIR, config.CHAT_IDLE_TTL)
+            eviction_task = start_eviction(
+                tournament_manager, config.CHAT_IDLE_TTL, config.EVICT_INTERVAL, state_file
+            )
+        logger.info(f"🧩 Воркер {shard_id} запущен")
+
+        while True:
+            item = await loop.run_in_executor(None, updates.get)
+            kind = item[0]
+
+            if kind == 'stop':
+                break
+
+            if kind == 'update':
+                # Обрабатываем по порядку, как и в однопроцессном режиме
+                await application.process_update(Update.de_json(item[1], application.bot))
+            elif kind == 'query':
+                _, query_id, name = item
+                try:
+                    results.put((query_id, shard_id, await answer_query(name, shard_id)))
+                except Exception as e:
+                    logger.error(f"Ошибка запроса {name} в воркере {shard_id}: {e}")
+                    results.put((query_id, shard_id, None))
+
+        if eviction_task is not None:
+            eviction_task.cancel()
+        await application.stop()
+
+    if state_file:
+        try:
+            tournament_manager.save_to_file(state_file)
+        except OSError as e:
+            logger.error(f"❌ Воркер {shard_id}: не удалось сохранить состояние: {e}")
+
+def worker_main(shard_id: int, token: str, updates, results, offline: bool = False):
+    """Точка входа процесса-воркера"""
+    # Остановкой управляет приемник через сигнал 'stop' в очереди
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    asyncio.run(_run_worker(shard_id, token, updates, results, offline))
+
+class ShardRouter:
+    """Распределяет обновления по процессам-воркерам"""
+
+    def __init__(self, shards: int):
+        self.shards = shards
+        self._context = multiprocessing.get_context()
+        self.queues = [self._context.Queue() for _ in range(shards)]
+        self.results = self._context.Queue()
+        self.processes: List[multiprocessing.Process] = []
+        self.routed = [0] * shards
+        self._query_ids = itertools.count(1)
+        # Ответы воркеров по запросам: очередь результатов общая для параллельных запросов
+        self._answers: Dict[int, Dict[int, object]] = {}
+        self._answers_lock = threading.Lock()
+
+    def start(self, token: str, offline: bool = False):
+        """Запускает процессы-воркеры"""
+        for shard_id in range(self.shards):
+            process = self._context.Process(
+                target=worker_main,
+                args=(shard_id, token, self.queues[shard_id], self.results, offline),
+                name=f"shard-{shard_id}",
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+
+    def route(self, data: Dict) -> int:
+        """Отправляет сырое обновление воркеру, владеющему чатом"""
+        chat_id = extract_chat_id(data)
+        shard_id = shard_for(chat_id, self.shards) if chat_id is not None else 0
+        self.queues[shard_id].put(('update', data))
+        self.routed[shard_id] += 1
+        return shard_id
+
+    def query(self, name: str, timeout: float = 5.0) -> List:
+        """Опрашивает все воркеры и возвращает ответы по порядку шардов
+
+        Безопасен для вызова из нескольких потоков: чужие ответы, прочитанные
+        из общей очереди, откладываются для своего запроса, а не теряются.
+        """
+        query_id = next(self._query_ids)
+        with self._answers_lock:
+            answers = self._answers[query_id] = {}
+        for shard_queue in self.queues:
+            shard_queue.put(('query', query_id, name))
+
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                with self._answers_lock:
+                    if len(answers) >= self.shards:
+                        break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"⚠️ Ответили {len(answers)} из {self.shards} воркеров на запрос {name}")
+                    break
+                try:
+                    # Короткое ожидание: ответы могут прийти через очередь соседнего запроса
+                    answer_id, shard_id, data = self.results.get(timeout=min(remaining, 0.1))
+                except queue.Empty:
+                    continue
+                with self._answers_lock:
+                    # Ответы на запросы, которые уже вышли по таймауту, отбрасываем
+                    if answer_id in self._answers:
+                        self._answers[answer_id][shard_id] = data
+        finally:
+            with self._answers_lock:
+                self._answers.pop(query_id, None)
+
+        return [answers[shard_id] for shard_id in sorted(answers) if answers[shard_id] is not None]
+
+    def signal_workers(self, signum: int):
+        """Пересылает сигнал живым воркерам"""
+        for process in self.processes:
+            if process.is_alive():
+                os.kill(process.pid, signum)
+
+    def stop(self, timeout: float = 10.0):
+        """Останавливает воркеры"""
+        for shard_queue in self.queues:
+            shard_queue.put(('stop',))
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+
+async def route_update(update, context):
+    """Приемник: пересылает обновление воркеру"""
+    context.bot_data['shard_router'].route(update.to_dict())
+
+async def aggregated_tournaments_command(update, context):
+    """Команда /tournaments в многопроцессном режиме - сводка со всех воркеров"""
+    from telegram.constants import ParseMode
+    from telegram.ext import ApplicationHandlerStop
+    from handlers.commands import format_active_tournaments
+
+    if update.effective_user.id == config.ADMIN_ID:
+        router = context.bot_data['shard_router']
+        loop = asyncio.get_running_loop()
+        answers = await loop.run_in_executor(None, router.query, 'active_tournaments')
+        tournaments = [tournament for shard in answers for tournament in shard]
+
+        await update.message.reply_text(
+            format_active_tournaments(tournaments),
+            parse_mode=ParseMode.HTML
+        )
+
+    # Не передаем команду воркерам
+    raise ApplicationHandlerStop
+
+async def aggregated_fairness_command(update, context):
+    """Команда /fairness в многопроцессном режиме - анализ сложенных гистограмм всех воркеров"""
+    from telegram.constants import ParseMode
+    from telegram.ext import ApplicationHandlerStop
+    from handlers.commands import format_fairness
+
+    if update.effective_user.id == config.ADMIN_ID:
+        try:
+            from utils.analytics import analyze_histograms, merge_histograms
+        except ImportError:
+            await update.message.reply_text("⚠️ Для аналитики нужен пакет numpy.")
+            raise ApplicationHandlerStop
+
+        router = context.bot_data['shard_router']
+        loop = asyncio.get_running_loop()
+        answers = await loop.run_in_executor(None, router.query, 'fairness')
+        user_rolls = merge_histograms(shard['users'] for shard in answers)
+        chat_rolls = merge_histograms(shard['chats'] for shard in answers)
+        names = {user_id: name for shard in answers for user_id, name in shard['names'].items()}
+
+        users = await asyncio.to_thread(analyze_histograms, user_rolls)
+        chats = await asyncio.to_thread(analyze_histograms, chat_rolls)
+        await update.message.reply_text(
+            format_fairness(users, chats, names),
+            parse_mode=ParseMode.HTML
+        )
+
+    raise ApplicationHandlerStop
+
+async def aggregated_memory_command(update, context):
+    """Команда /memory [evict] в многопроцессном режиме - память всех воркеров"""
+    from telegram.constants import ParseMode
+    from telegram.ext import ApplicationHandlerStop
+    from handlers.commands import format_memory
+
+    if update.effective_user.id == config.ADMIN_ID:
+        evict = bool(context.args) and context.args[0].lower() == 'evict'
+        if evict and config.CHAT_IDLE_TTL <= 0:
+            await update.message.reply_text("⚠️ Выгрузка чатов выключена (CHAT_IDLE_TTL=0).")
+            raise ApplicationHandlerStop
+
+        router = context.bot_data['shard_router']
+        loop = asyncio.get_running_loop()
+        answers = await loop.run_in_executor(None, router.query, 'memory_evict' if evict else 'memory')
+
+        rss = [shard['rss'] for shard in answers]
+        evicted_now = [shard['evicted_now'] for shard in answers if shard['evicted_now'] is not None]
+        await update.message.reply_text(
+            format_memory(
+                [chat for shard in answers for chat in shard['report']],
+                sum(rss) if rss and None not in rss else None,
+                sum(shard['offloaded'] for shard in answers),
+                sum(shard['evicted'] for shard in answers),
+                sum(shard['rehydrated'] for shard in answers),
+                (sum(count for count, _ in evicted_now), sum(freed for _, freed in evicted_now)) if evict else None,
+                processes=len(answers)
+            ),
+            parse_mode=ParseMode.HTML
+        )
+
+    raise ApplicationHandlerStop
+
+def broadcast_defaults(handler):
+    """В личке /active, /inactive и /settings меняют общие настройки - их применяет приемник
+
+    Иначе новые значения по умолчанию увидел бы только воркер шарда этой лички.
+    Приемник пишет файл и шлет воркерам SIGHUP, все они перечитывают настройки.
+    """
+    async def command(update, context):
+        from telegram.ext import ApplicationHandlerStop
+        from utils.chat_settings import get_chat_settings
+
+        # Файл мог поменяться вручную: приемник сам SIGHUP не перечитывает, а пересылает
+        await get_chat_settings(context).sync()
+        await handler(update, context)
+        context.bot_data['shard_router'].signal_workers(signal.SIGHUP)
+        raise ApplicationHandlerStop
+
+    return command
+
+def run_sharded(workers: int):
+    """Запускает приемник обновлений и N воркеров"""
+    from telegram import Update
+    from telegram.ext import Application, CommandHandler, TypeHandler, filters
+    from handlers.commands import active_command, inactive_command, settings_command
+    from utils.request import build_requests
+
+    router = ShardRouter(workers)
+    router.start(config.BOT_TOKEN)
+
+    api_request, updates_request = build_requests(config)
+    application = (
+        Application.builder()
+        .token(config.BOT_TOKEN)
+        .request(api_request)
+        .get_updates_request(updates_request)
+        .build()
+    )
+    application.bot_data['shard_router'] = router
+
+    # Админские сводки по всему процессу собирает приемник, иначе ответил бы один воркер
+    application.add_handler(CommandHandler("tournaments", aggregated_tournaments_command), group=-1)
+    application.add_handler(CommandHandler("fairness", aggregated_fairness_command), group=-1)
+    application.add_handler(CommandHandler("memory", aggregated_memory_command), group=-1)
+    for name, handler in (("active", active_command), ("inactive", inactive_command), ("settings", settings_command)):
+        application.add_handler(
+            CommandHandler(name, broadcast_defaults(handler), filters=filters.ChatType.PRIVATE), group=-1
+        )
+    application.add_handler(TypeHandler(Update, route_update))
+
+    # run_polling перехватывает только SIGINT/SIGTERM/SIGABRT: без обработчика SIGHUP
+    # завершил бы приемник. Настройки читают воркеры - пересылаем сигнал им
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda signum, frame: router.signal_workers(signum))
+
+    logger.info(f"🧩 Многопроцессный режим: {workers} воркеров")
+    try:
+        application.run_polling(drop_pending_updates=True, allowed_updates=Update.ALL_TYPES)
+    finally:
+        router.stop()
+        logger.info(f"🧩 Распределено обновлений по воркерам: {router.routed}")
+
+def run_fake(count: int, workers: int, chats: int, users_per_chat: int, seed: Optional[int] = None):
+    """Прогоняет фейковые обновления через воркеры без сети и печатает сводку"""
+    from fake_updates import FAKE_ADMIN_ID, generate_updates
+    from utils.scoring import GAMES
+
+    router = ShardRouter(workers)
+    router.start('0:offline', offline=True)
+
+    started = time.perf_counter()
+    # Без ADMIN_ID /start шлет создатель фейковых чатов - иначе ни один турнир не начнется
+    for data in generate_updates(count, chats, users_per_chat, config.ADMIN_ID or FAKE_ADMIN_ID, seed):
+        router.route(data)
+    summaries = router.query('summary', timeout=300.0)
+    elapsed = time.perf_counter() - started
+
+    router.stop()
+
+    print(f"Обновлений: {count + chats} за {elapsed:.2f} с ({(count + chats) / elapsed:.0f}/с)")
+    print(f"По воркерам: {router.routed}")
+    for summary in summaries:
+        points = ", ".join(f"{game} {GAMES[game]['unit']}: {total}" for game, total in summary['points'].items())
+        print(f"Шард {summary['shard']}: турниров {summary['active']}, "
+              f"игроков {summary['players']}" + (f", {points}" if points else ""))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Многопроцессный режим бота")
+    parser.add_argument('--workers', type=int, default=max(config.SHARD_WORKERS, 2))
+    parser.add_argument('--fake', type=int, default=0, help="прогнать N фейковых бросков без сети")
+    parser.add_argument('--chats', type=int, default=50)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+
+    if not config.validate():
+        raise SystemExit(1)
+
+    if args.fake:
+        run_fake(args.fake, args.workers, args.chats, args.users, args.seed)
+    else:
+        run_sharded(args.workers)
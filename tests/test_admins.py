@@ -0,0 +1,63 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("telegram")
+
+from utils.admins import ChatAdminCache
+
+class FakeBot:
+    """Бот, отвечающий на get_chat_administrators из словаря и считающий вызовы"""
+
+    def __init__(self, admins):
+        self.admins = admins
+        self.calls = 0
+
+    async def get_chat_administrators(self, chat_id):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return [SimpleNamespace(user=SimpleNamespace(id=user_id)) for user_id in self.admins[chat_id]]
+
+def test_cached_within_ttl():
+    async def scenario():
+        bot = FakeBot({-1: {10}})
+        cache = ChatAdminCache(ttl=600)
+        assert await cache.is_admin(bot, -1, 10)
+        assert not await cache.is_admin(bot, -1, 11)
+        return bot.calls
+
+    assert asyncio.run(scenario()) == 1
+
+def test_expired_entry_is_refreshed():
+    async def scenario():
+        bot = FakeBot({-1: {10}})
+        cache = ChatAdminCache(ttl=0)
+        await cache.is_admin(bot, -1, 10)
+        bot.admins[-1] = {11}
+        return await cache.is_admin(bot, -1, 11), bot.calls
+
+    assert asyncio.run(scenario()) == (True, 2)
+
+def test_concurrent_misses_share_one_request():
+    async def scenario():
+        bot = FakeBot({-1: {10}})
+        cache = ChatAdminCache(ttl=600)
+        results = await asyncio.gather(*(cache.is_admin(bot, -1, user_id) for user_id in (10, 11, 10, 12)))
+        return results, bot.calls
+
+    assert asyncio.run(scenario()) == ([True, False, True, False], 1)
+
+def test_owner_and_member_updates():
+    async def scenario():
+        bot = FakeBot({-1: {10}})
+        cache = ChatAdminCache(ttl=600, owner_id=99)
+        assert await cache.is_admin(bot, -1, 99)
+        assert bot.calls == 0
+
+        await cache.is_admin(bot, -1, 10)
+        cache.apply_member_status(-1, 11, 'administrator')
+        cache.apply_member_status(-1, 10, 'member')
+        return await cache.is_admin(bot, -1, 11), await cache.is_admin(bot, -1, 10), bot.calls
+
+    assert asyncio.run(scenario()) == (True, False, 1)
@@ -0,0 +1,37 @@
+import math
+from array import array
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.analytics import JACKPOT_VALUE, SLOT_VALUES, analyze_histograms, erfc, merge_histograms
+
+def test_erfc_matches_math():
+    xs = np.linspace(-6, 8, 401)
+    expected = np.array([math.erfc(x) for x in xs])
+    assert np.allclose(erfc(xs), expected, rtol=2e-7, atol=0)
+
+def test_loaded_slot_is_an_outlier():
+    fair = array('I', [10] * SLOT_VALUES)
+    loaded = array('I', [10] * SLOT_VALUES)
+    loaded[JACKPOT_VALUE - 1] = 200
+
+    report = analyze_histograms({1: fair, 2: loaded})
+    assert report['subjects'] == 2
+    assert [outlier['id'] for outlier in report['outliers']] == [2]
+
+def test_empty_histograms():
+    report = analyze_histograms({})
+    assert report['attempts'] == 0
+    assert report['outliers'] == []
+
+def test_merge_histograms_sums_shared_ids():
+    first = {1: array('I', [1] * SLOT_VALUES), 2: array('I', [2] * SLOT_VALUES)}
+    second = {1: array('I', [3] * SLOT_VALUES)}
+
+    merged = merge_histograms([first, second])
+    assert list(merged[1]) == [4] * SLOT_VALUES
+    assert list(merged[2]) == [2] * SLOT_VALUES
+    # Исходные гистограммы не меняются
+    assert list(first[1]) == [1] * SLOT_VALUES
@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+from api_server import ApiServer
+from database import TournamentManager
+
+async def request(port: int, path: str, headers: str = ""):
+    """GET по отдельному соединению: (статус, заголовки, тело)"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n{headers}\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode('latin-1').split("\r\n")
+    parsed = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        parsed[name.strip().lower()] = value.strip()
+    return int(status_line.split(" ")[1]), parsed, body
+
+async def start_server(manager: TournamentManager) -> ApiServer:
+    server = ApiServer(manager, port=0)
+    await server.start()
+    return server
+
+def test_etag_reuse_and_not_modified():
+    manager = TournamentManager()
+    manager.start_tournament(-100, "Чат")
+    manager.add_win(-100, 5, "Ann")
+    path = "/api/chats/-100/leaderboard"
+
+    async def scenario():
+        server = await start_server(manager)
+        try:
+            first = await request(server.port, path)
+            second = await request(server.port, path)
+            cached = await request(server.port, path, f"If-None-Match: {first[1]['etag']}\r\n")
+            manager.add_win(-100, 5, "Ann")
+            changed = await request(server.port, path)
+            return first, second, cached, changed, server.misses
+        finally:
+            await server.stop()
+
+    first, second, cached, changed, misses = asyncio.run(scenario())
+    assert first[0] == 200 and json.loads(first[2])['rows'][0]['score'] == 1
+    assert second[1]['etag'] == first[1]['etag']
+    assert cached[0] == 304 and cached[2] == b""
+    assert changed[0] == 200 and changed[1]['etag'] != first[1]['etag']
+    assert json.loads(changed[2])['rows'][0]['score'] == 2
+    # Сериализация только при первом запросе и после изменения счета
+    assert misses == 2
+
+def test_history_is_not_rebuilt_on_every_score():
+    manager = TournamentManager()
+    manager.start_tournament(-100, "Чат")
+    manager.add_win(-100, 5, "Ann")
+    manager.stop_tournament(-100)
+    manager.start_tournament(-100, "Чат")
+
+    async def scenario():
+        server = await start_server(manager)
+        try:
+            first = await request(server.port, "/api/history")
+            manager.add_win(-100, 5, "Ann")
+            after_score = await request(server.port, "/api/history")
+            manager.stop_tournament(-100)
+            after_stop = await request(server.port, "/api/history")
+            return first, after_score, after_stop
+        finally:
+            await server.stop()
+
+    first, after_score, after_stop = asyncio.run(scenario())
+    assert after_score[1]['etag'] == first[1]['etag']
+    assert after_stop[1]['etag'] != first[1]['etag']
+    assert json.loads(after_stop[2])['total'] == 2
+
+def test_score_event_is_streamed():
+    manager = TournamentManager()
+    manager.start_tournament(-100, "Чат")
+
+    async def scenario():
+        server = await start_server(manager)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"GET /api/events?chat_id=-100 HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            await asyncio.wait_for(reader.readuntil(b"retry: 3000\n\n"), 5)
+            # Подписчик регистрируется после заголовков - даем обработчику дойти до очереди
+            while not server._subscribers:
+                await asyncio.sleep(0.01)
+
+            manager.add_win(-100, 5, "Ann")
+            event = await asyncio.wait_for(reader.readuntil(b"\n\n"), 5)
+            writer.close()
+            return event
+        finally:
+            await server.stop()
+
+    event = asyncio.run(scenario()).decode()
+    name, data = event.strip().split("\n")
+    assert name == "event: score"
+    payload = json.loads(data[len("data: "):])
+    assert payload['chat_id'] == -100 and payload['user_id'] == 5
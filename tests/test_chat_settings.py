@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+import pytest
+
+from utils.chat_settings import ChatSettings, ChatSettingsStore, parse_setting
+
+def test_set_and_reset_persist(tmp_path):
+    filename = tmp_path / "chat_settings.json"
+    store = ChatSettingsStore(ChatSettings(), str(filename))
+
+    asyncio.run(store.set(-100, {'active': 'off', 'cooldown': '2.5'}))
+    assert store.get(-100).active is False
+    assert store.get(-100).cooldown == 2.5
+    assert store.get(-200).active is True
+    assert json.loads(filename.read_text(encoding='utf-8'))['chats'] == {'-100': {'active': False, 'cooldown': 2.5}}
+
+    asyncio.run(store.reset(-100))
+    assert store.get(-100).active is True
+
+def test_set_picks_up_manual_edits(tmp_path):
+    filename = tmp_path / "chat_settings.json"
+    filename.write_text(json.dumps({'chats': {'-300': {'age_limit': 30}}}), encoding='utf-8')
+    store = ChatSettingsStore(ChatSettings(), str(filename))
+
+    asyncio.run(store.set(None, {'coalesce': 5}))
+    assert store.get(-300).age_limit == 30
+    assert store.get(-300).coalesce == 5
+
+def test_unknown_setting_names_are_rejected(tmp_path):
+    store = ChatSettingsStore(ChatSettings(), str(tmp_path / "chat_settings.json"))
+    # Имя аргумента set() в качестве настройки - тоже просто неизвестная настройка
+    for name in ('chat_id', 'changes', 'nope'):
+        with pytest.raises(ValueError):
+            asyncio.run(store.set(-100, {name: '5'}))
+
+def test_parse_setting_limits():
+    assert parse_setting('active', 'вкл') is True
+    with pytest.raises(ValueError):
+        parse_setting('age_limit', 5)
+    with pytest.raises(ValueError):
+        parse_setting('unknown', 1)
@@ -0,0 +1,69 @@
+import os
+import time
+
+from database import TournamentManager
+from utils.scoring import DEFAULT_GAME
+
+def make_manager(tmp_path) -> TournamentManager:
+    manager = TournamentManager()
+    manager.start_tournament(-100, "Чат", 60)
+    manager.add_win(-100, 5, "Ann")
+    manager.add_win(-100, 5, "Ann")
+    manager.add_win(-100, 6, "Bob")
+    manager.start_tournament(-200, "Другой чат", 60)
+    manager.attach_offload_dir(str(tmp_path))
+    return manager
+
+def offload(manager: TournamentManager, chat_id: int):
+    with open(manager.offload_path(chat_id), 'w', encoding='utf-8') as f:
+        f.write(manager.export_chat(chat_id))
+    manager.drop_chat(chat_id)
+
+def test_offload_rehydrate_round_trip(tmp_path):
+    manager = make_manager(tmp_path)
+    stats = manager.get_stats(-100, DEFAULT_GAME)
+    start_time = manager.get_tournament_info(-100, DEFAULT_GAME)['start_time']
+
+    offload(manager, -100)
+    assert manager.chat_ids() == {-200}
+    assert manager.is_offloaded(-100)
+    assert manager.get_tournament_info(-100, DEFAULT_GAME) is None
+
+    manager.ensure_chat(-100)
+    assert manager.get_stats(-100, DEFAULT_GAME) == stats
+    assert manager.get_tournament_info(-100, DEFAULT_GAME)['start_time'] == start_time
+    assert not manager.is_offloaded(-100)
+
+    manager.add_win(-100, 6, "Bob")
+    assert manager.get_player_score(-100, 6) == 2
+
+def test_offloaded_chats_found_on_attach(tmp_path):
+    manager = make_manager(tmp_path)
+    offload(manager, -100)
+
+    restarted = TournamentManager()
+    restarted.attach_offload_dir(str(tmp_path))
+    assert restarted.is_offloaded(-100)
+
+def test_read_only_rehydrate_is_evicted_again(tmp_path):
+    manager = make_manager(tmp_path)
+    offload(manager, -100)
+
+    manager.ensure_chat(-100, touch=False)
+    assert -100 in manager.chat_ids()
+    assert -100 not in manager.idle_chats(60)
+    assert -100 in manager.idle_chats(60, now=time.monotonic() + 61)
+
+def test_offload_file_kept_until_backup(tmp_path):
+    manager = make_manager(tmp_path / "offload")
+    offload(manager, -100)
+    manager.ensure_chat(-100)
+
+    # До резервной копии чат после сбоя восстановится только из файла выгрузки
+    assert os.listdir(tmp_path / "offload") == ["-100.json"]
+    manager.save_to_file(str(tmp_path / "backup.json"))
+    assert os.listdir(tmp_path / "offload") == []
+
+def test_export_without_state(tmp_path):
+    manager = make_manager(tmp_path)
+    assert manager.export_chat(-300) is None
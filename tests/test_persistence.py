@@ -0,0 +1,82 @@
+import json
+from datetime import datetime
+
+from database import TournamentManager
+from utils.scoring import DEFAULT_GAME
+
+def test_active_tournaments_survive_restart(tmp_path):
+    filename = str(tmp_path / "backup.json")
+    manager = TournamentManager()
+    manager.start_tournament(-100, "Чат", 60)
+    manager.add_win(-100, 5, "Ann")
+    manager.start_tournament(-100, "Чат", game="🎲")
+    manager.add_win(-100, 6, "Bob", game="🎲", points=4)
+    manager.save_to_file(filename)
+
+    restarted = TournamentManager()
+    assert restarted.load_from_file(filename)
+    tournament = restarted.get_tournament_info(-100, DEFAULT_GAME)
+    assert isinstance(tournament['start_time'], datetime)
+    assert restarted.get_player_score(-100, 5) == 1
+    assert restarted.get_player_score(-100, 6, game="🎲") == 4
+
+    restarted.add_win(-100, 5, "Ann")
+    assert restarted.get_player_score(-100, 5) == 2
+    assert restarted.get_tournament_by_id(tournament['tournament_id']) is tournament
+
+def test_new_tournaments_do_not_reuse_restored_ids(tmp_path):
+    filename = str(tmp_path / "backup.json")
+    manager = TournamentManager()
+    manager.start_tournament(-100, "Чат", 60)
+    manager.save_to_file(filename)
+
+    restarted = TournamentManager()
+    restarted.load_from_file(filename)
+    restarted.start_tournament(-200, "Другой чат", 60)
+    ids = {t['tournament_id'] for t in restarted.get_all_active_tournaments()}
+    assert len(ids) == 2
+
+def test_missing_backup(tmp_path):
+    assert not TournamentManager().load_from_file(str(tmp_path / "missing.json"))
+
+def test_finished_results_survive_restart(tmp_path):
+    filename = str(tmp_path / "backup.json")
+    manager = TournamentManager()
+    manager.start_tournament(-100, "Чат", 60)
+    manager.add_win(-100, 5, "Ann")
+    results = manager.stop_tournament(-100)
+    tournament_id = results['tournament_data']['tournament_id']
+    manager.save_to_file(filename)
+
+    restarted = TournamentManager()
+    restarted.load_from_file(filename)
+    restored = restarted.tournament_results[tournament_id]
+    assert isinstance(restored['tournament_data']['end_time'], datetime)
+    assert restored['player_stats'] == {5: 1}
+
+    restarted.start_tournament(-100, "Чат", 60)
+    assert restarted.get_tournament_info(-100, DEFAULT_GAME)['tournament_id'] > tournament_id
+
+def test_baseline_backup_with_tournaments_by_chat_id(tmp_path):
+    filename = tmp_path / "backup.json"
+    filename.write_text(json.dumps({
+        'active_tournaments': {
+            '-100': {
+                'start_time': '2024-01-01T12:00:00', 'end_time': None, 'chat_title': 'Чат',
+                'duration_minutes': None, 'is_active': True, 'message_count': 3
+            }
+        },
+        'tournament_history': [],
+        'backup_time': '2024-01-01T12:30:00'
+    }), encoding='utf-8')
+
+    manager = TournamentManager()
+    assert manager.load_from_file(str(filename))
+    tournament = manager.get_tournament_info(-100, DEFAULT_GAME)
+    assert tournament['chat_id'] == -100
+    assert tournament['start_time'] == datetime(2024, 1, 1, 12)
+
+def test_malformed_backup_is_not_fatal(tmp_path):
+    filename = tmp_path / "backup.json"
+    filename.write_text(json.dumps({'tournament_history': [{'tournament_data': {}}]}), encoding='utf-8')
+    assert not TournamentManager().load_from_file(str(filename))
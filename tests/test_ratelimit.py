@@ -0,0 +1,39 @@
+from utils.ratelimit import TokenBucketLimiter
+
+def test_burst_then_throttle():
+    limiter = TokenBucketLimiter(rate=1, burst=3, warn_window=60)
+    assert [limiter.check(-1, 7, now=1000.0) for _ in range(3)] == [(True, False)] * 3
+    # Первый отказ с предупреждением, следующие в окне - молча
+    assert limiter.check(-1, 7, now=1000.0) == (False, True)
+    assert limiter.check(-1, 7, now=1000.5) == (False, False)
+    assert limiter.throttled == 2
+
+def test_refill_is_capped_by_burst():
+    limiter = TokenBucketLimiter(rate=1, burst=2)
+    for _ in range(2):
+        limiter.check(-1, 7, now=1000.0)
+    assert limiter.check(-1, 7, now=1001.0)[0]
+    assert not limiter.check(-1, 7, now=1001.0)[0]
+
+    # Долгая пауза не копит больше burst токенов
+    assert [limiter.check(-1, 7, now=1100.0)[0] for _ in range(3)] == [True, True, False]
+
+def test_users_and_chats_are_independent():
+    limiter = TokenBucketLimiter(rate=1, burst=1)
+    assert limiter.check(-1, 7, now=1000.0)[0]
+    assert limiter.check(-1, 8, now=1000.0)[0]
+    assert limiter.check(-2, 7, now=1000.0)[0]
+    assert not limiter.check(-1, 7, now=1000.0)[0]
+
+def test_per_chat_override():
+    limiter = TokenBucketLimiter(rate=10, burst=10)
+    assert limiter.check(-1, 7, now=1000.0, rate=0.5, burst=1)[0]
+    assert not limiter.check(-1, 7, now=1001.0, rate=0.5, burst=1)[0]
+    assert limiter.check(-1, 7, now=1003.0, rate=0.5, burst=1)[0]
+
+def test_idle_buckets_are_evicted():
+    limiter = TokenBucketLimiter(rate=1, burst=1, idle_ttl=10)
+    limiter.check(-1, 7, now=1000.0)
+    limiter.check(-1, 8, now=1005.0)
+    limiter.check(-1, 9, now=1012.0)
+    assert len(limiter) == 2
@@ -0,0 +1,48 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("telegram")
+
+from telegram.error import TimedOut
+
+from utils.request import build_requests
+
+def make_config(**overrides):
+    values = dict(
+        HTTP_POOL_SIZE=4, HTTP_CONNECT_TIMEOUT=5.0, HTTP_READ_TIMEOUT=10.0, HTTP_WRITE_TIMEOUT=10.0,
+        HTTP_POOL_TIMEOUT=3.0, HTTP_KEEPALIVE_EXPIRY=30.0, HTTP_VERSION='1.1',
+        UPDATES_POOL_SIZE=1, UPDATES_READ_TIMEOUT=10.0, UPDATES_POOL_TIMEOUT=5.0
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+def test_separate_pools_scale_with_bots():
+    async def scenario():
+        api_request, updates_request = build_requests(make_config(), bots=3)
+        try:
+            return api_request.pool_size, updates_request.pool_size, api_request is updates_request
+        finally:
+            await api_request.shutdown()
+            await updates_request.shutdown()
+
+    assert asyncio.run(scenario()) == (4, 3, False)
+
+def test_exhausted_pool_times_out_and_is_counted():
+    async def scenario():
+        api_request, updates_request = build_requests(make_config(HTTP_POOL_SIZE=2))
+        try:
+            for _ in range(api_request.pool_size):
+                await api_request._slots.acquire()
+            with pytest.raises(TimedOut):
+                await api_request.do_request("https://api.telegram.org/botTOKEN/getMe", "POST", pool_timeout=0.01)
+            return api_request.get_metrics()
+        finally:
+            await api_request.shutdown()
+            await updates_request.shutdown()
+
+    metrics = asyncio.run(scenario())
+    assert metrics['pool_timeouts'] == 1
+    assert metrics['requests'] == 0
+    assert metrics['pool_size'] == 2
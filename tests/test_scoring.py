@@ -0,0 +1,30 @@
+from utils.scoring import DEFAULT_GAME, GAMES, SCORE_TABLE, parse_game, score_roll, split_game_args
+
+def test_every_game_has_a_score_table():
+    assert set(SCORE_TABLE) == set(GAMES)
+    assert DEFAULT_GAME in GAMES
+
+def test_score_roll_tables():
+    assert score_roll("🎰", 64) == 1
+    assert score_roll("🎰", 63) == 0
+    assert [score_roll("🏀", value) for value in range(1, 6)] == [0, 0, 0, 1, 1]
+    assert [score_roll("⚽", value) for value in range(1, 6)] == [0, 0, 1, 1, 1]
+    assert [score_roll("🎲", value) for value in range(1, 7)] == [1, 2, 3, 4, 5, 6]
+
+def test_score_roll_out_of_range():
+    assert score_roll("🎰", 0) == 0
+    assert score_roll("🎰", 65) == 0
+    assert score_roll("🎯", 7) == 0
+    assert score_roll("🃏", 1) == 0
+
+def test_parse_game():
+    assert parse_game("⚽️") == "⚽"
+    assert parse_game("DARTS") == "🎯"
+    assert parse_game("кости") == "🎲"
+    assert parse_game("chess") is None
+
+def test_numbers_are_durations_not_games():
+    assert parse_game("777") is None
+    assert split_game_args(["777"]) == (None, ["777"])
+    assert split_game_args(["60", "darts"]) == ("🎯", ["60"])
+    assert split_game_args(["🎰", "🎯"]) == ("🎰", ["🎯"])
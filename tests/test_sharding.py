@@ -0,0 +1,46 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sharding import ShardRouter, extract_chat_id, shard_for
+
+def test_shard_for_is_stable_and_in_range():
+    for chat_id in (-1001234567890, -42, 0, 42, 1001234567890):
+        shard = shard_for(chat_id, 4)
+        assert 0 <= shard < 4
+        assert shard == shard_for(chat_id, 4)
+    # Группа и тот же id со знаком минус попадают в один шард
+    assert shard_for(-42, 4) == shard_for(42, 4)
+
+def test_extract_chat_id():
+    assert extract_chat_id({'update_id': 1, 'message': {'chat': {'id': -100}}}) == -100
+    assert extract_chat_id({'update_id': 1}) is None
+
+def serve_queries(router: ShardRouter, stop: threading.Event):
+    """Отвечает на запросы вместо процессов-воркеров"""
+    def worker(shard_id):
+        while not stop.is_set():
+            item = router.queues[shard_id].get()
+            if item[0] == 'stop':
+                return
+            _, query_id, name = item
+            router.results.put((query_id, shard_id, f"{name}:{shard_id}"))
+    threads = [threading.Thread(target=worker, args=(shard_id,), daemon=True) for shard_id in range(router.shards)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def test_concurrent_queries_get_their_own_answers():
+    router = ShardRouter(3)
+    stop = threading.Event()
+    threads = serve_queries(router, stop)
+    try:
+        with ThreadPoolExecutor(4) as pool:
+            names = [f"q{i}" for i in range(8)]
+            answers = list(pool.map(lambda name: router.query(name, timeout=5.0), names))
+        assert answers == [[f"{name}:{shard}" for shard in range(3)] for name in names]
+    finally:
+        stop.set()
+        for shard_queue in router.queues:
+            shard_queue.put(('stop',))
+        for thread in threads:
+            thread.join(1)
@@ -0,0 +1,29 @@
+from utils.templates import split_message
+
+def utf16_len(text: str) -> int:
+    return len(text.encode('utf-16-le')) // 2
+
+def test_short_text_is_not_split():
+    assert split_message("короткий текст", limit=100) == ["короткий текст"]
+
+def test_split_on_line_boundaries():
+    text = "\n".join(["aaa"] * 3)
+    assert split_message(text, limit=8) == ["aaa\naaa", "aaa"]
+
+def test_limit_counts_utf16_units():
+    # Эмодзи - два символа UTF-16: 4 эмодзи = 8 единиц, в лимит 7 не помещаются
+    text = "😀😀\n😀😀"
+    assert split_message(text, limit=7) == ["😀😀", "😀😀"]
+
+def test_long_line_does_not_break_surrogate_pairs():
+    text = "😀" * 10
+    chunks = split_message(text, limit=5)
+    assert "".join(chunks) == text
+    assert all(utf16_len(chunk) <= 5 for chunk in chunks)
+
+def test_chunks_fit_limit_and_keep_content():
+    lines = [f"{i}. Игрок 🎰 {'x' * (i % 17)}" for i in range(500)]
+    text = "\n".join(lines)
+    chunks = split_message(text, limit=200)
+    assert all(utf16_len(chunk) <= 200 for chunk in chunks)
+    assert "\n".join(chunks) == text
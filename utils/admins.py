@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from telegram import ChatMember
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+ADMIN_STATUSES = (ChatMember.ADMINISTRATOR, ChatMember.OWNER)
+
+class ChatAdminCache:
+    """Кэш администраторов чатов с TTL и обновлением по chat_member"""
+
+    def __init__(self, ttl: float = 600, owner_id: int = 0):
+        self.ttl = ttl
+        self.owner_id = owner_id  # владелец бота - админ везде
+
+        self._admins: Dict[int, Tuple[float, Set[int]]] = {}
+        self._pending: Dict[int, asyncio.Future] = {}
+        self.api_calls = 0
+
+    async def is_admin(self, bot, chat_id: int, user_id: int) -> bool:
+        """Проверяет права пользователя; API вызывается только при промахе кэша"""
+        if self.owner_id and user_id == self.owner_id:
+            return True
+
+        entry = self._admins.get(chat_id)
+        if entry is not None and time.monotonic() < entry[0]:
+            return user_id in entry[1]
+
+        admins = await self._refresh(bot, chat_id)
+        return user_id in admins
+
+    async def _refresh(self, bot, chat_id: int) -> Set[int]:
+        """Загружает список админов; параллельные промахи ждут один запрос"""
+        pending = self._pending.get(chat_id)
+        if pending is not None:
+            return await pending
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[chat_id] = future
+        try:
+            self.api_calls += 1
+            members = await bot.get_chat_administrators(chat_id)
+            admins = {member.user.id for member in members}
+            self._admins[chat_id] = (time.monotonic() + self.ttl, admins)
+        except Exception as e:
+            logger.warning(f"Не удалось получить админов чата {chat_id}: {e}")
+            # Оставляем устаревший список, если он был, и повторим через минуту
+            stale = self._admins.get(chat_id)
+            admins = stale[1] if stale else set()
+            self._admins[chat_id] = (time.monotonic() + min(self.ttl, 60), admins)
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._pending[chat_id]
+
+        future.set_result(admins)
+        return admins
+
+    def apply_member_status(self, chat_id: int, user_id: int, status: str):
+        """Обновляет кэш по событию изменения участника чата"""
+        entry = self._admins.get(chat_id)
+        if entry is None:
+            return
+
+        if status in ADMIN_STATUSES:
+            entry[1].add(user_id)
+        else:
+            entry[1].discard(user_id)
+
+    def invalidate(self, chat_id: Optional[int] = None):
+        """Сбрасывает кэш чата (или весь кэш)"""
+        if chat_id is None:
+            self._admins.clear()
+        else:
+            self._admins.pop(chat_id, None)
+
+    def __len__(self) -> int:
+        return len(self._admins)
+
+# Глобальный кэш администраторов
+admin_cache = ChatAdminCache(ttl=config.ADMIN_CACHE_TTL, owner_id=config.ADMIN_ID)
+
+async def is_chat_admin(update, context) -> bool:
+    """Проверяет, что команду отправил администратор этого чата"""
+    chat = update.effective_chat
+    message = update.effective_message
+
+    # Анонимный администратор пишет от имени самого чата
+    if message and message.sender_chat and message.sender_chat.id == chat.id:
+        return True
+
+    if chat.type == 'private':
+        return update.effective_user.id == config.ADMIN_ID
+
+    return await admin_cache.is_admin(context.bot, chat.id, update.effective_user.id)
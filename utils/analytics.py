@@ -0,0 +1,118 @@
+import math
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Значение 🎰, соответствующее 777
+JACKPOT_VALUE = 64
+SLOT_VALUES = 64
+
+# Минимум бросков для критерия хи-квадрат (ожидаемая частота >= 5 в каждой ячейке)
+MIN_ATTEMPTS = 5 * SLOT_VALUES
+
+# Коэффициенты erfc из Numerical Recipes (erfcc): относительная ошибка < 1.2e-7
+_ERFC_COEFFS = (
+    -1.26551223, 1.00002368, 0.37409196, 0.09678418, -0.18628806,
+    0.27886807, -1.13520398, 1.48851587, -0.82215223, 0.17087277
+)
+
+def erfc(x: np.ndarray) -> np.ndarray:
+    """Векторная erfc на массивах float64 (без scipy и поэлементных вызовов Python)"""
+    x = np.asarray(x, dtype=np.float64)
+    t = 1.0 / (1.0 + 0.5 * np.abs(x))
+    poly = np.zeros_like(t)
+    for coeff in reversed(_ERFC_COEFFS[1:]):
+        poly = t * (coeff + poly)
+    result = t * np.exp(-x * x + _ERFC_COEFFS[0] + poly)
+    return np.where(x >= 0, result, 2.0 - result)
+
+def histograms_to_matrix(histograms: Dict[int, array]) -> Tuple[np.ndarray, np.ndarray]:
+    """Склеивает гистограммы в матрицу (n, 64) без копирования по элементам"""
+    if not histograms:
+        return np.empty(0, dtype=np.int64), np.empty((0, SLOT_VALUES), dtype=np.int64)
+
+    ids = np.fromiter(histograms.keys(), dtype=np.int64, count=len(histograms))
+    buffer = b''.join(histogram.tobytes() for histogram in histograms.values())
+    counts = np.frombuffer(buffer, dtype=np.uint32).reshape(-1, SLOT_VALUES).astype(np.int64)
+    return ids, counts
+
+def merge_histograms(parts: Iterable[Dict[int, array]]) -> Dict[int, array]:
+    """Складывает гистограммы из нескольких источников (шардов) по id
+
+    Игрок может бросать в чатах разных шардов, поэтому его гистограммы суммируются.
+    """
+    merged: Dict[int, np.ndarray] = {}
+    for histograms in parts:
+        for key, histogram in histograms.items():
+            counts = np.frombuffer(histogram, dtype=np.uint32)
+            merged[key] = merged[key] + counts if key in merged else counts.copy()
+    return {key: array('I', counts.tobytes()) for key, counts in merged.items()}
+
+def chi_square_uniform(counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Хи-квадрат против равномерного распределения 1/64 для каждой строки
+
+    p-значение считается по аппроксимации Уилсона-Хилферти (без scipy).
+    """
+    attempts = counts.sum(axis=1)
+    expected = attempts / SLOT_VALUES
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chi2 = np.where(
+            attempts > 0,
+            ((counts - expected[:, None]) ** 2).sum(axis=1) / expected,
+            0.0
+        )
+
+    dof = SLOT_VALUES - 1
+    z = (np.cbrt(chi2 / dof) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+    p_values = 0.5 * erfc(z / math.sqrt(2))
+    return chi2, p_values
+
+def analyze_histograms(histograms: Dict[int, array], alpha: float = 0.001,
+                       z_limit: float = 5.0) -> Dict:
+    """Пакетный анализ честности бросков для всех игроков (или чатов) сразу"""
+    ids, counts = histograms_to_matrix(histograms)
+    attempts = counts.sum(axis=1)
+    hits = counts[:, JACKPOT_VALUE - 1]
+
+    expected_rate = 1 / SLOT_VALUES
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hit_rates = np.where(attempts > 0, hits / attempts, 0.0)
+        # z-оценка частоты 777 относительно биномиального распределения
+        hit_z = np.where(
+            attempts > 0,
+            (hits - attempts * expected_rate) / np.sqrt(attempts * expected_rate * (1 - expected_rate)),
+            0.0
+        )
+
+    chi2, p_values = chi_square_uniform(counts)
+
+    # Подозрительные: достаточно бросков и либо распределение не равномерное, либо слишком много 777
+    enough = attempts >= MIN_ATTEMPTS
+    suspicious = enough & ((p_values < alpha) | (hit_z > z_limit))
+
+    outliers: List[Dict] = [
+        {
+            'id': int(ids[i]),
+            'attempts': int(attempts[i]),
+            'hits': int(hits[i]),
+            'hit_rate': float(hit_rates[i]),
+            'hit_z': float(hit_z[i]),
+            'chi2': float(chi2[i]),
+            'p_value': float(p_values[i])
+        }
+        for i in np.flatnonzero(suspicious)[np.argsort(-hit_z[suspicious])]
+    ]
+
+    total_counts = counts.sum(axis=0, keepdims=True)
+    total_chi2, total_p = chi_square_uniform(total_counts)
+
+    return {
+        'subjects': int(len(ids)),
+        'tested': int(enough.sum()),
+        'attempts': int(attempts.sum()),
+        'hits': int(hits.sum()),
+        'total_chi2': float(total_chi2[0]) if len(ids) else 0.0,
+        'total_p_value': float(total_p[0]) if len(ids) else 1.0,
+        'outliers': outliers
+    }
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import logging
+import os
+import signal
+from typing import Dict, Iterable, Optional
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Настройка -> (тип, минимум, максимум, описание)
+SETTINGS = {
+    'active': (bool, None, None, "бот считает броски в чате"),
+    'age_limit': (int, 10, 86400, "максимальный возраст броска, сек"),
+    'max_duration': (int, 1, 10080, "максимальная длительность турнира, мин"),
+    'coalesce': (float, 0, 300, "окно объединения поздравлений, сек (0 - отвечать на каждое)"),
+    'cooldown': (float, 0, 3600, "пауза между засчитанными бросками игрока, сек (0 - выкл)"),
+}
+
+TRUE_VALUES = ('1', 'on', 'yes', 'true', 'да', 'вкл')
+FALSE_VALUES = ('0', 'off', 'no', 'false', 'нет', 'выкл')
+
+class ChatSettings:
+    """Настройки одного чата; неизменяемый снимок, изменения создают новый объект"""
+    __slots__ = tuple(SETTINGS)
+
+    def __init__(self, active: bool = True, age_limit: int = 120, max_duration: int = 1440,
+                 coalesce: float = 0.0, cooldown: float = 0.0):
+        self.active = active
+        self.age_limit = age_limit
+        self.max_duration = max_duration
+        self.coalesce = coalesce
+        self.cooldown = cooldown
+
+    def replace(self, **changes) -> 'ChatSettings':
+        values = self.to_dict()
+        values.update(changes)
+        return ChatSettings(**values)
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in SETTINGS}
+
+def parse_setting(name: str, raw) -> object:
+    """Проверяет и приводит значение настройки (строка из команды или значение из JSON)"""
+    if name not in SETTINGS:
+        raise ValueError(f"неизвестная настройка {name}")
+    kind, low, high, _ = SETTINGS[name]
+
+    if kind is bool:
+        if isinstance(raw, bool):
+            return raw
+        text = str(raw).strip().lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+        raise ValueError(f"{name}: ожидается on или off")
+
+    try:
+        value = kind(raw)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: ожидается число")
+    if not low <= value <= high:
+        raise ValueError(f"{name}: допустимо от {low} до {high}")
+    return value
+
+def _parse_overrides(data: Dict) -> Dict:
+    return {name: parse_setting(name, value) for name, value in (data or {}).items()}
+
+class ChatSettingsStore:
+    """Настройки всех чатов: общие значения и переопределения по чатам
+
+    На горячем пути get() - один поиск в словаре. Команды и перезагрузка
+    собирают новый словарь и подменяют ссылку целиком, поэтому чтение
+    никогда не видит наполовину примененный файл. Файл читается и пишется
+    в отдельном потоке, изменения из команд выполняются по очереди.
+    """
+
+    def __init__(self, defaults: ChatSettings, filename: Optional[str] = None):
+        self.base = defaults  # значения из окружения
+        self.filename = filename
+        self._default_overrides: Dict = {}
+        self._overrides: Dict[int, Dict] = {}
+        self.defaults = defaults
+        self._chats: Dict[int, ChatSettings] = {}
+        self._write_lock = asyncio.Lock()
+
+    def get(self, chat_id: int) -> ChatSettings:
+        return self._chats.get(chat_id, self.defaults)
+
+    def overrides(self, chat_id: Optional[int]) -> Dict:
+        """Переопределенные настройки чата (None - общие)"""
+        return dict(self._default_overrides if chat_id is None else self._overrides.get(chat_id, {}))
+
+    def _apply(self, default_overrides: Dict, overrides: Dict[int, Dict]):
+        """Пересобирает снимки настроек и подменяет их одним присваиванием"""
+        defaults = self.base.replace(**default_overrides)
+        chats = {chat_id: defaults.replace(**values) for chat_id, values in overrides.items() if values}
+
+        self._default_overrides = default_overrides
+        self._overrides = {chat_id: values for chat_id, values in overrides.items() if values}
+        self.defaults, self._chats = defaults, chats
+
+    async def sync(self):
+        """Подтягивает файл перед изменением: его могли поменять вручную или другие воркеры"""
+        try:
+            data = await asyncio.to_thread(self.read_file)
+            if data is not None:
+                self.load(data)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Файл настроек чатов не прочитан, изменяю текущие: {e}")
+
+    async def set(self, chat_id: Optional[int], changes: Dict) -> ChatSettings:
+        """Меняет настройки чата (None - общие) и сохраняет файл
+
+        changes - {имя: значение}; неизвестное имя дает ValueError.
+        """
+        changes = _parse_overrides(changes)
+        async with self._write_lock:
+            await self.sync()
+            default_overrides = dict(self._default_overrides)
+            overrides = dict(self._overrides)
+            if chat_id is None:
+                default_overrides.update(changes)
+            else:
+                overrides[chat_id] = {**overrides.get(chat_id, {}), **changes}
+
+            self._apply(default_overrides, overrides)
+            await asyncio.to_thread(self.write_file, self.file_data())
+        return self.defaults if chat_id is None else self.get(chat_id)
+
+    async def reset(self, chat_id: Optional[int]):
+        """Сбрасывает переопределения чата (None - общие) и сохраняет файл"""
+        async with self._write_lock:
+            await self.sync()
+            if chat_id is None:
+                self._apply({}, self._overrides)
+            else:
+                overrides = dict(self._overrides)
+                overrides.pop(chat_id, None)
+                self._apply(self._default_overrides, overrides)
+            await asyncio.to_thread(self.write_file, self.file_data())
+
+    def read_file(self) -> Optional[Dict]:
+        """Читает файл настроек; None, если файла нет"""
+        if not self.filename or not os.path.exists(self.filename):
+            return None
+        with open(self.filename, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, data: Optional[Dict] = None) -> int:
+        """Применяет данные файла; при ошибке старые настройки остаются. Возвращает число чатов"""
+        if data is None:
+            data = self.read_file()
+        if data is None:
+            return len(self._chats)
+        if not isinstance(data, dict):
+            raise ValueError("ожидается объект с ключами defaults и chats")
+
+        default_overrides = _parse_overrides(data.get('defaults'))
+        overrides = {int(chat_id): _parse_overrides(values) for chat_id, values in data.get('chats', {}).items()}
+        self._apply(default_overrides, overrides)
+        return len(self._chats)
+
+    def file_data(self) -> Dict:
+        """Переопределения в виде содержимого файла (снимок для записи в другом потоке)"""
+        return {
+            'defaults': dict(self._default_overrides),
+            'chats': {str(chat_id): dict(values) for chat_id, values in self._overrides.items()}
+        }
+
+    def write_file(self, data: Dict):
+        """Атомарно записывает переопределения в файл"""
+        if not self.filename:
+            return
+        temp = f"{self.filename}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp, self.filename)
+
+    async def reload(self):
+        """Перечитывает файл в отдельном потоке, не останавливая обработку обновлений"""
+        try:
+            data = await asyncio.to_thread(self.read_file)
+            chats = self.load(data)
+            logger.info(f"⚙️ Настройки чатов перечитаны: {chats} чатов с переопределениями")
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Не удалось перечитать настройки чатов, оставлены прежние: {e}")
+
+    def install_reload_signal(self):
+        """SIGHUP перечитывает файл настроек (вызывается из работающего event loop)"""
+        install_reload_signal([self])
+
+def install_reload_signal(stores: Iterable[ChatSettingsStore]):
+    """SIGHUP перечитывает файлы всех хранилищ (у процесса один обработчик сигнала)"""
+    if not hasattr(signal, 'SIGHUP'):
+        return
+    stores = list(stores)
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGHUP, lambda: [loop.create_task(store.reload()) for store in stores])
+
+def default_settings() -> ChatSettings:
+    """Общие значения из окружения"""
+    return ChatSettings(
+        active=config.DEFAULT_CHAT_ACTIVE,
+        age_limit=config.MESSAGE_AGE_LIMIT,
+        max_duration=config.MAX_TOURNAMENT_DURATION
+    )
+
+# Глобальное хранилище настроек чатов
+chat_settings = ChatSettingsStore(default_settings(), config.CHAT_SETTINGS_FILE)
+
+def get_chat_settings(context) -> ChatSettingsStore:
+    """Настройки чатов бота, обрабатывающего обновление
+
+    В мультибот-режиме у каждого бота свое хранилище в bot_data, иначе - глобальное.
+    """
+    return context.bot_data.get('chat_settings', chat_settings)
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import os
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def _write_atomic(path: str, payload: str):
+    temp = f"{path}.tmp"
+    with open(temp, 'w', encoding='utf-8') as f:
+        f.write(payload)
+    os.replace(temp, path)
+
+async def evict_idle_chats(manager, idle_ttl: float) -> Tuple[int, int]:
+    """Выгружает чаты без обновлений дольше idle_ttl секунд. Возвращает (чатов, байт освобождено)
+    
+    Файл пишется в отдельном потоке; если за это время в чат пришло обновление,
+    выгрузка отменяется и чат остается в памяти.
+    """
+    from utils.admins import admin_cache
+    
+    if not manager.offload_dir:
+        return 0, 0
+    
+    evicted = freed = 0
+    for chat_id in manager.idle_chats(idle_ttl):
+        seen = manager.chat_last_seen.get(chat_id)
+        payload = manager.export_chat(chat_id)
+        if payload is None:
+            manager.forget_chat(chat_id)
+            continue
+        
+        size = manager.chat_memory(chat_id)
+        path = manager.offload_path(chat_id)
+        try:
+            await asyncio.to_thread(_write_atomic, path, payload)
+        except OSError as e:
+            logger.error(f"❌ Не удалось выгрузить чат {chat_id}: {e}")
+            continue
+        
+        if manager.chat_last_seen.get(chat_id) != seen:
+            # Чат ожил во время записи: файл уберет следующая резервная копия
+            manager.keep_offload_file(chat_id)
+            continue
+        
+        manager.drop_chat(chat_id)
+        admin_cache.invalidate(chat_id)
+        evicted += 1
+        freed += size
+    
+    return evicted, freed
+
+async def eviction_loop(manager, idle_ttl: float, interval: float, state_file: Optional[str] = None):
+    """Периодическая выгрузка неактивных чатов и сохранение резервной копии
+    
+    Копия пишется после выгрузки, чтобы аварийная остановка теряла не больше interval секунд.
+    """
+    from utils.memory import format_bytes
+    
+    while True:
+        await asyncio.sleep(interval)
+        if idle_ttl > 0 and manager.offload_dir:
+            try:
+                evicted, freed = await evict_idle_chats(manager, idle_ttl)
+                if evicted:
+                    logger.info(f"💤 Выгружено неактивных чатов: {evicted}, освобождено ~{format_bytes(freed)}")
+            except Exception as e:
+                logger.error(f"❌ Ошибка выгрузки неактивных чатов: {e}")
+        
+        if state_file:
+            try:
+                await asyncio.to_thread(manager.save_to_file, state_file)
+            except (OSError, TypeError, ValueError) as e:
+                logger.error(f"❌ Не удалось сохранить резервную копию {state_file}: {e}")
+
+def attach_offload(manager, directory: str, idle_ttl: float):
+    """Подключает каталог выгрузки до приема обновлений
+    
+    При выключенной выгрузке каталог все равно подключается, если он есть:
+    ранее выгруженные чаты должны вернуться в память при следующем обновлении.
+    """
+    if idle_ttl > 0 or os.path.isdir(directory):
+        manager.attach_offload_dir(directory)
+
+def start_eviction(manager, idle_ttl: float, interval: float, state_file: Optional[str] = None):
+    """Запускает цикл выгрузки и автосохранения; None, если делать нечего"""
+    if interval <= 0 or not (state_file or (idle_ttl > 0 and manager.offload_dir)):
+        return None
+    return asyncio.get_running_loop().create_task(eviction_loop(manager, idle_ttl, interval, state_file))
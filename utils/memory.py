@@ -0,0 +1,48 @@
+import os
+import sys
+from array import array
+from typing import Optional, Set
+
+def deep_sizeof(obj, seen: Optional[Set[int]] = None) -> int:
+    """Оценка памяти объекта вместе с содержимым контейнеров
+
+    Общие объекты (одни и те же числа и строки) считаются один раз за вызов.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += deep_sizeof(key, seen) + deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_sizeof(item, seen)
+    # array хранит значения в своем буфере - sys.getsizeof их уже учел
+    elif not isinstance(obj, (str, bytes, int, float, bool, array)) and hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+def process_rss() -> Optional[int]:
+    """Текущий RSS процесса в байтах (Linux), иначе пиковый или None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+def format_bytes(size: float) -> str:
+    for unit in ("Б", "КБ", "МБ"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "Б" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ГБ"
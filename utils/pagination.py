@@ -0,0 +1,103 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from utils import templates
+
+# Версия завершенного турнира: его рейтинг больше не меняется
+FINISHED = -1
+
+PAGE_FOOTER = "📄 Страница {page} из {pages}"
+
+class _Board:
+    """Отсортированный рейтинг одной версии турнира и его отрисованные страницы"""
+    __slots__ = ('version', 'rows', 'pages', 'ranks')
+
+    def __init__(self, version: int, rows: Sequence[Tuple[int, int]]):
+        self.version = version
+        self.rows = rows
+        self.pages: Dict[int, str] = {}
+        self.ranks: Optional[Dict[int, int]] = None
+
+class LeaderboardPageCache:
+    """Кэш страниц рейтинга по (ключ турнира, версия)
+
+    Рейтинг сортируется один раз на версию турнира, каждая страница
+    рисуется один раз; листание одной версии не трогает ни сортировку, ни имена.
+    """
+
+    def __init__(self, page_size: int = 20, max_boards: int = 256):
+        self.page_size = page_size
+        self.max_boards = max_boards
+        self._boards: 'OrderedDict[Hashable, _Board]' = OrderedDict()
+
+    def _board(self, tournament_id: Hashable, version: int,
+               load_rows: Callable[[], Sequence[Tuple[int, int]]]) -> _Board:
+        """Возвращает актуальную версию рейтинга, пересортировывая только при изменении"""
+        board = self._boards.get(tournament_id)
+        if board is None or board.version != version:
+            board = self._boards[tournament_id] = _Board(version, load_rows())
+        self._boards.move_to_end(tournament_id)
+
+        while len(self._boards) > self.max_boards:
+            self._boards.popitem(last=False)
+        return board
+
+    def page_count(self, rows: Sequence) -> int:
+        return max(1, -(-len(rows) // self.page_size))
+
+    def get_page(self, tournament_id: Hashable, version: int, load_rows: Callable[[], Sequence[Tuple[int, int]]],
+                 page: int, names: Dict[int, str], header: str = "", footer: str = "",
+                 emoji: str = "🎰") -> Tuple[str, int, int]:
+        """Возвращает (текст, номер страницы, всего страниц); page считается с нуля"""
+        board = self._board(tournament_id, version, load_rows)
+        pages = self.page_count(board.rows)
+        page = min(max(page, 0), pages - 1)
+
+        text = board.pages.get(page)
+        if text is None:
+            start = page * self.page_size
+            rows = templates.render_leaderboard_rows(
+                board.rows[start:start + self.page_size], names, start=start + 1, emoji=emoji
+            )
+            parts = [header] if header else []
+            parts.extend(rows)
+            if pages > 1:
+                parts.append("\n" + PAGE_FOOTER.format(page=page + 1, pages=pages))
+            if footer:
+                parts.append("\n" + footer)
+            text = board.pages[page] = "\n".join(parts)
+
+        return text, page, pages
+
+    def find_user_page(self, tournament_id: Hashable, version: int,
+                       load_rows: Callable[[], Sequence[Tuple[int, int]]], user_id: int) -> Optional[int]:
+        """Возвращает страницу, на которой находится игрок"""
+        board = self._board(tournament_id, version, load_rows)
+        if board.ranks is None:
+            board.ranks = {uid: index for index, (uid, _) in enumerate(board.rows)}
+        index = board.ranks.get(user_id)
+        return None if index is None else index // self.page_size
+
+def build_keyboard(tournament_id: int, page: int, pages: int) -> Optional[InlineKeyboardMarkup]:
+    """Кнопки листания рейтинга; callback_data вида lb:<tournament_id>:<страница>"""
+    if pages <= 1:
+        return None
+
+    navigation: List[InlineKeyboardButton] = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton("⏮", callback_data=f"lb:{tournament_id}:0"))
+        navigation.append(InlineKeyboardButton("◀️", callback_data=f"lb:{tournament_id}:{page - 1}"))
+    navigation.append(InlineKeyboardButton(f"{page + 1}/{pages}", callback_data=f"lb:{tournament_id}:{page}"))
+    if page < pages - 1:
+        navigation.append(InlineKeyboardButton("▶️", callback_data=f"lb:{tournament_id}:{page + 1}"))
+        navigation.append(InlineKeyboardButton("⏭", callback_data=f"lb:{tournament_id}:{pages - 1}"))
+
+    return InlineKeyboardMarkup([
+        navigation,
+        [InlineKeyboardButton("📍 Моя позиция", callback_data=f"lb:{tournament_id}:me")]
+    ])
+
+# Глобальный кэш страниц рейтинга
+leaderboard_pages = LeaderboardPageCache()
@@ -0,0 +1,72 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+class _Bucket:
+    """Состояние одного ведра токенов"""
+    __slots__ = ('tokens', 'updated', 'warned')
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+        self.warned = 0.0
+
+class TokenBucketLimiter:
+    """Ограничение частоты бросков для пары (chat_id, user_id)"""
+
+    def __init__(self, rate: float, burst: int, warn_window: float = 60, idle_ttl: float = 600):
+        self.rate = rate  # токенов в секунду
+        self.burst = burst  # максимальный запас токенов
+        self.warn_window = warn_window
+        self.idle_ttl = idle_ttl
+
+        # Порядок ключей = порядок последнего обращения, старые ведра в начале
+        self._buckets: 'OrderedDict[Tuple[int, int], _Bucket]' = OrderedDict()
+        self.throttled = 0
+
+    def check(self, chat_id: int, user_id: int, now: Optional[float] = None,
+              rate: Optional[float] = None, burst: Optional[int] = None) -> Tuple[bool, bool]:
+        """Возвращает (разрешено, нужно ли предупредить пользователя)
+
+        rate и burst переопределяют общие значения для чата (например, пауза между бросками).
+        """
+        if now is None:
+            now = time.monotonic()
+        if rate is None:
+            rate = self.rate
+        if burst is None:
+            burst = self.burst
+
+        key = (chat_id, user_id)
+        bucket = self._buckets.get(key)
+
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(burst, now)
+        else:
+            bucket.tokens = min(burst, bucket.tokens + (now - bucket.updated) * rate)
+            bucket.updated = now
+            self._buckets.move_to_end(key)
+
+        self._evict_idle(now)
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return True, False
+
+        self.throttled += 1
+        if now - bucket.warned >= self.warn_window:
+            bucket.warned = now
+            return False, True
+        return False, False
+
+    def _evict_idle(self, now: float):
+        """Удаляет ведра, к которым не обращались дольше idle_ttl"""
+        buckets = self._buckets
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            if now - bucket.updated < self.idle_ttl:
+                break
+            del buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+import httpx
+from telegram.error import TimedOut
+from telegram.request import HTTPXRequest
+
+class MeteredHTTPXRequest(HTTPXRequest):
+    """HTTPXRequest с настраиваемым keep-alive и метриками ожидания пула"""
+
+    def __init__(
+        self,
+        name: str,
+        connection_pool_size: int,
+        connect_timeout: float,
+        read_timeout: float,
+        write_timeout: float,
+        pool_timeout: float,
+        keepalive_expiry: Optional[float] = None,
+        http_version: str = "1.1"
+    ):
+        super().__init__(
+            connection_pool_size=connection_pool_size,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            write_timeout=write_timeout,
+            pool_timeout=pool_timeout,
+            http_version=http_version
+        )
+
+        # HTTPXRequest не дает задать keepalive_expiry - пересобираем клиент с нужными лимитами
+        if keepalive_expiry is not None:
+            self._client_kwargs['limits'] = httpx.Limits(
+                max_connections=connection_pool_size,
+                max_keepalive_connections=connection_pool_size,
+                keepalive_expiry=keepalive_expiry
+            )
+            self._client = self._build_client()
+
+        self.name = name
+        self.pool_size = connection_pool_size
+        self.default_pool_timeout = pool_timeout
+
+        # Семафор повторяет размер пула httpx, поэтому время ожидания на нем
+        # и есть время ожидания свободного соединения
+        self._slots = asyncio.Semaphore(connection_pool_size)
+        self._in_flight = 0
+        self.metrics: Dict[str, float] = {
+            'requests': 0,
+            'waited': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+            'pool_timeouts': 0,
+            'peak_in_flight': 0
+        }
+
+    async def do_request(self, url, method, request_data=None, read_timeout=HTTPXRequest.DEFAULT_NONE,
+                         write_timeout=HTTPXRequest.DEFAULT_NONE, connect_timeout=HTTPXRequest.DEFAULT_NONE,
+                         pool_timeout=HTTPXRequest.DEFAULT_NONE):
+        """Выполняет запрос, замеряя ожидание свободного соединения"""
+        wait_limit = pool_timeout if pool_timeout is None or isinstance(pool_timeout, (int, float)) else self.default_pool_timeout
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=wait_limit)
+        except asyncio.TimeoutError as exc:
+            self.metrics['pool_timeouts'] += 1
+            raise TimedOut(
+                f"Пул '{self.name}' занят: все {self.pool_size} соединений используются"
+            ) from exc
+
+        waited = time.perf_counter() - started
+        self.metrics['requests'] += 1
+        if waited > 0.001:
+            self.metrics['waited'] += 1
+            self.metrics['wait_total'] += waited
+            self.metrics['wait_max'] = max(self.metrics['wait_max'], waited)
+
+        self._in_flight += 1
+        self.metrics['peak_in_flight'] = max(self.metrics['peak_in_flight'], self._in_flight)
+        try:
+            return await super().do_request(
+                url=url,
+                method=method,
+                request_data=request_data,
+                read_timeout=read_timeout,
+                write_timeout=write_timeout,
+                connect_timeout=connect_timeout,
+                pool_timeout=pool_timeout
+            )
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    def get_metrics(self) -> Dict[str, float]:
+        """Возвращает снимок метрик пула"""
+        metrics = dict(self.metrics)
+        metrics['in_flight'] = self._in_flight
+        metrics['pool_size'] = self.pool_size
+        metrics['wait_avg'] = metrics['wait_total'] / metrics['waited'] if metrics['waited'] else 0.0
+        return metrics
+
+def build_requests(config, bots: int = 1) -> tuple[MeteredHTTPXRequest, MeteredHTTPXRequest]:
+    """Создает отдельные пулы для исходящих вызовов и для get_updates
+
+    bots - сколько ботов делят пулы: каждому нужен свой long polling.
+    """
+    api_request = MeteredHTTPXRequest(
+        name='api',
+        connection_pool_size=config.HTTP_POOL_SIZE,
+        connect_timeout=config.HTTP_CONNECT_TIMEOUT,
+        read_timeout=config.HTTP_READ_TIMEOUT,
+        write_timeout=config.HTTP_WRITE_TIMEOUT,
+        pool_timeout=config.HTTP_POOL_TIMEOUT,
+        keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+        http_version=config.HTTP_VERSION
+    )
+
+    updates_request = MeteredHTTPXRequest(
+        name='updates',
+        connection_pool_size=config.UPDATES_POOL_SIZE * bots,
+        connect_timeout=config.HTTP_CONNECT_TIMEOUT,
+        read_timeout=config.UPDATES_READ_TIMEOUT,
+        write_timeout=config.HTTP_WRITE_TIMEOUT,
+        pool_timeout=config.UPDATES_POOL_TIMEOUT,
+        keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+        http_version=config.HTTP_VERSION
+    )
+
+    return api_request, updates_request
+
+def format_pool_metrics(request: MeteredHTTPXRequest) -> str:
+    """Форматирует метрики пула для отчета"""
+    m = request.get_metrics()
+    return (
+        f"🔌 <b>Пул {request.name}</b> (размер {m['pool_size']})\n"
+        f"• Запросов: {int(m['requests'])}\n"
+        f"• Ждали соединение: {int(m['waited'])}\n"
+        f"• Среднее ожидание: {m['wait_avg'] * 1000:.1f} мс\n"
+        f"• Максимальное ожидание: {m['wait_max'] * 1000:.1f} мс\n"
+        f"• Таймаутов пула: {int(m['pool_timeouts'])}\n"
+        f"• Пик одновременных: {int(m['peak_in_flight'])}, сейчас: {int(m['in_flight'])}"
+    )
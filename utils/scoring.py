@@ -0,0 +1,67 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+# Игра по умолчанию - классический турнир 777
+DEFAULT_GAME = "🎰"
+
+# Значение 🎰 - три барабана по 4 символа: value - 1 = левый + 4 * средний + 16 * правый
+SLOT_JACKPOT = 64  # 7️⃣7️⃣7️⃣
+
+# Описание игр: заголовок попадания, что считаем (род. падеж) и отвечать ли на каждое очко
+GAMES: Dict[str, Dict] = {
+    "🎰": {'title': "ДЖЕКПОТ", 'unit': "777", 'announce': True},
+    "🎯": {'title': "ЯБЛОЧКО", 'unit': "попаданий в яблочко", 'announce': True},
+    "🏀": {'title': "ПОПАДАНИЕ", 'unit': "попаданий в кольцо", 'announce': True},
+    "⚽": {'title': "ГОЛ", 'unit': "голов", 'announce': True},
+    "🎳": {'title': "СТРАЙК", 'unit': "страйков", 'announce': True},
+    "🎲": {'title': "ОЧКИ", 'unit': "очков", 'announce': False},
+}
+
+# Названия игр для аргументов команд (/start 60 darts); числа - всегда длительность
+GAME_ALIASES = {
+    'slots': "🎰", 'слоты': "🎰",
+    'darts': "🎯", 'дартс': "🎯",
+    'basketball': "🏀", 'баскетбол': "🏀",
+    'football': "⚽", 'футбол': "⚽",
+    'bowling': "🎳", 'боулинг': "🎳",
+    'dice': "🎲", 'кости': "🎲", 'кубик': "🎲",
+}
+
+def _table(size: int, points: Dict[int, int]) -> Tuple[int, ...]:
+    """Таблица очков, индекс - значение кубика (индекс 0 не используется)"""
+    return tuple(points.get(value, 0) for value in range(size + 1))
+
+# Очки за бросок: SCORE_TABLE[emoji][value], вычисляются один раз при импорте
+SCORE_TABLE: Dict[str, Tuple[int, ...]] = {
+    "🎰": _table(64, {SLOT_JACKPOT: 1}),
+    "🎯": _table(6, {6: 1}),  # яблочко
+    "🏀": _table(5, {4: 1, 5: 1}),  # мяч в кольце
+    "⚽": _table(5, {3: 1, 4: 1, 5: 1}),  # гол
+    "🎳": _table(6, {6: 1}),  # страйк
+    "🎲": _table(6, {value: value for value in range(1, 7)}),  # сумма выпавших очков
+}
+
+def score_roll(emoji: str, value: int) -> int:
+    """Очки за бросок: один поиск в словаре и один индекс в таблице"""
+    table = SCORE_TABLE.get(emoji)
+    return table[value] if table is not None and 0 < value < len(table) else 0
+
+def parse_game(arg: str) -> Optional[str]:
+    """Распознает игру по эмодзи или названию"""
+    arg = arg.strip().replace('\ufe0f', '')  # ⚽️ и ⚽ - одна игра
+    if arg.lstrip('-').isdigit():
+        return None
+    if arg in GAMES:
+        return arg
+    return GAME_ALIASES.get(arg.lower())
+
+def split_game_args(args: Sequence[str]) -> Tuple[Optional[str], list]:
+    """Отделяет игру от остальных аргументов команды"""
+    game = None
+    rest = []
+    for arg in args:
+        parsed = parse_game(arg)
+        if parsed and game is None:
+            game = parsed
+        else:
+            rest.append(arg)
+    return game, rest
@@ -0,0 +1,69 @@
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class StartupTimer:
+    """Время фаз запуска: от старта процесса до готовности принимать обновления"""
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self._last = self.started
+        self.phases: List[Tuple[str, float, bool]] = []  # (фаза, секунды, шла параллельно)
+        self.ready: Optional[float] = None
+        self.first_update: Optional[float] = None
+
+    def mark(self, phase: str):
+        """Закрывает последовательную фазу, начавшуюся с прошлой отметки"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last, False))
+        self._last = now
+
+    def add_parallel(self, phase: str, seconds: float):
+        """Учитывает фазу, которая шла параллельно с остальными"""
+        self.phases.append((phase, seconds, True))
+
+    def mark_ready(self):
+        self.mark("запуск polling")
+        self.ready = time.perf_counter() - self.started
+
+    def mark_first_update(self) -> bool:
+        """Отмечает первое обновление; True только для первого вызова"""
+        if self.first_update is not None:
+            return False
+        self.first_update = time.perf_counter() - self.started
+        return True
+
+    def report(self) -> str:
+        lines = ["⏱️ Запуск по фазам:"]
+        for phase, seconds, parallel in self.phases:
+            lines.append(f"  • {phase}: {seconds * 1000:.0f} мс" + (" (параллельно)" if parallel else ""))
+        if self.ready is not None:
+            lines.append(f"  = готов к обновлениям через {self.ready * 1000:.0f} мс после старта")
+        return "\n".join(lines)
+
+class Warmup:
+    """Фоновый прогрев состояния, пока основной поток занят сетью"""
+
+    def __init__(self, timer: StartupTimer, tasks: List[Tuple[str, Callable[[], object]]]):
+        self.timer = timer
+        self.tasks = tasks
+        self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+
+    def start(self) -> 'Warmup':
+        self._thread.start()
+        return self
+
+    def _run(self):
+        for name, task in self.tasks:
+            started = time.perf_counter()
+            try:
+                task()
+            except Exception as e:
+                logger.error(f"❌ Прогрев '{name}' не удался: {e}")
+            self.timer.add_parallel(name, time.perf_counter() - started)
+
+    def join(self):
+        self._thread.join()
@@ -0,0 +1,264 @@
+import html
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Лимит длины сообщения Telegram (в UTF-16 символах)
+MESSAGE_LIMIT = 4096
+
+# ========== СТАТИЧЕСКИЕ ТЕКСТЫ (собираются один раз при импорте) ==========
+
+RULES_TEXT = (
+    "📋 <b>ПРАВИЛА ТУРНИРА</b> 📋\n\n"
+
+    "✅ <b>ЗАСЧИТЫВАЕТСЯ:</b>\n"
+    "• Только новые сообщения с 🎰\n"
+    "• Сообщения отправленные лично вами\n"
+    "• Сообщения младше 2 минут\n\n"
+
+    "❌ <b>НЕ ЗАСЧИТЫВАЕТСЯ:</b>\n"
+    "• Пересланные сообщения (даже свои старые!)\n"
+    "• Сообщения из истории чата\n"
+    "• Сообщения старше 2 минут\n\n"
+
+    "⚖️ <b>СИСТЕМА ЧЕСТНАЯ:</b>\n"
+    "• Автоматическая проверка каждого сообщения\n"
+    "• Определение пересланных сообщений\n"
+    "• Проверка времени отправки\n\n"
+
+    "🎯 <b>ВЕРОЯТНОСТЬ ВЫИГРЫША:</b> 1/64 ≈ 1.56%\n\n"
+
+    "🏆 <b>ПОБЕДИТЕЛЬ:</b> Игрок с наибольшим количеством 777\n"
+    "При равенстве очков - несколько победителей\n\n"
+
+    "❓ <b>Вопросы?</b> Обращайтесь к администратору чата!"
+)
+
+HELP_TEXT = (
+    "🎰 <b>Бот для турниров по эмодзи 777</b> 🎰\n\n"
+
+    "👑 <b>Команды для администратора:</b>\n"
+    "<code>/start [минуты] [игра]</code> - Начать турнир\n"
+    "<code>/stop [игра]</code> - Завершить турнир и показать результаты\n"
+    "<code>/stats [игра]</code> - Текущая статистика турнира\n"
+    "<code>/rules</code> - Правила турнира\n"
+    "<code>/top [игра]</code> - Лучшие игроки за все время\n"
+    "<code>/me [игра]</code> - Ваша статистика за все время\n"
+    "<code>/active</code>, <code>/inactive</code> - Включить или выключить бота в чате\n"
+    "<code>/settings [имя значение]</code> - Настройки чата\n\n"
+
+    "🎮 <b>Игры:</b> 🎰 777 (по умолчанию), 🎯 яблочко, 🏀 и ⚽ попадания, "
+    "🎳 страйк, 🎲 сумма очков. В одном чате можно вести несколько турниров сразу.\n\n"
+
+    "📋 <b>Важные правила:</b>\n"
+    "• Учитываются ТОЛЬКО свежие сообщения (&lt;2 мин)\n"
+    "• Пересланные 🎰 НЕ засчитываются\n"
+    "• Система автоматически проверяет сообщения\n\n"
+
+    "🎮 <b>Как работает турнир:</b>\n"
+    "1. Админ: <code>/start</code> - начинается турнир\n"
+    "2. Игроки: Отправляют 🎰 (только новые!)\n"
+    "3. Админ: <code>/stop</code> - турнир завершается\n"
+    "4. Бот: Определяет победителя\n\n"
+
+    "🎯 <b>Вероятность 777:</b> 1/64 ≈ 1.56%\n"
+    "📊 <b>Ваша статистика:</b> 1/105 ≈ 0.95% (менее удачливый)\n\n"
+
+    "➕ <b>Добавьте бота в группу и дайте права администратора!</b>"
+)
+
+PRIVATE_WELCOME = (
+    "👋 Привет, {name}!\n\n"
+    "🎰 Я бот для проведения турниров по эмодзи 777.\n\n"
+    "📋 <b>Как использовать:</b>\n"
+    "1. Добавьте меня в группу\n"
+    "2. Дайте права администратора\n"
+    "3. В группе напишите /start для начала турнира\n"
+    "4. Напишите /stop для завершения турнира\n\n"
+    "🏆 Во время турнира я считаю все выпавшие 777 🎰\n"
+    "📊 После /stop показываю статистику и определяю победителя!\n\n"
+    "👑 Админские команды работают только от администратора чата."
+)
+
+TOURNAMENT_STARTED = (
+    "{emoji} <b>ТУРНИР НАЧАЛСЯ!</b> {emoji}\n\n"
+    "📊 Веду подсчет {unit} {emoji}.\n"
+    "{duration}\n"
+    "🏆 Победит игрок с наибольшим количеством {unit}!\n\n"
+    "📋 <b>Правила:</b>\n"
+    "✅ Учитываются только свежие сообщения\n"
+    "❌ Пересланные {emoji} не засчитываются\n"
+    "❌ Сообщения старше 2 минут игнорируются\n\n"
+    "⚖️ <b>Только честная игра!</b>\n\n"
+    "<b>Команды:</b>\n"
+    "<code>/stop {emoji}</code> - завершить турнир\n"
+    "<code>/stats {emoji}</code> - текущая статистика\n"
+    "<code>/rules</code> - правила турнира"
+)
+DURATION_LIMITED = "⏱️ <b>Длительность:</b> {minutes} минут"
+DURATION_UNLIMITED = "⏱️ <b>Без ограничения по времени</b>"
+
+RESULTS_EMPTY = (
+    "{emoji} <b>ТУРНИР ОКОНЧЕН</b> {emoji}\n\n"
+    "😔 За время турнира никто не набрал ни одного очка ({unit}: 0).\n\n"
+    "📌 Помните: учитываются только свежие сообщения!\n\n"
+    "Ждем вас в следующем турнире! 🎉"
+)
+RESULTS_HEADER = (
+    "🏁 <b>ТУРНИР ОКОНЧЕН!</b> 🏁\n\n"
+    "📊 <b>Статистика турнира:</b>\n"
+    "• ⏱️ Длительность: {hours:02d}:{minutes:02d}:{seconds:02d}\n"
+    "• 👥 Участников: {players}\n"
+    "• {emoji} Всего {unit}: {total}\n\n"
+    "🏆 <b>ТОП ИГРОКОВ:</b> 🏆\n"
+)
+RESULTS_FOOTER = "🎉 <b>Поздравляем победителей!</b> 🎉"
+
+STATS_EMPTY = (
+    "📊 <b>Текущая статистика:</b>\n\n"
+    "Пока никто не набрал очков ({unit}: 0). Ждем первого победителя! {emoji}"
+)
+STATS_HEADER = "📊 <b>ТЕКУЩАЯ СТАТИСТИКА ТУРНИРА</b> {emoji}\n"
+MORE_PLAYERS = "... и еще {count} участников"
+
+REPORT_HEADER = (
+    "📊 <b>ОТЧЕТ О ТУРНИРЕ</b> 📊\n\n"
+    "💬 Чат: {chat_title}\n"
+    "🆔 ID: <code>{chat_id}</code>\n\n"
+    "📈 <b>Детальная статистика:</b>"
+)
+
+JACKPOT_TOURNAMENT = (
+    "🎉 <b>{title}!</b> 🎉\n\n"
+    "Поздравляем, {mention}! {emoji}\n\n"
+    "✅ <b>Засчитано в турнире!</b>\n"
+    "📊 Текущий счет: {score} {emoji}\n\n"
+    "Продолжайте в том же духе!"
+)
+HITS_COALESCED = (
+    "🎉 <b>ПОПАДАНИЯ ЗА {seconds} СЕК</b> 🎉\n\n"
+    "{lines}\n\n"
+    "✅ <b>Все засчитано в турнире!</b>"
+)
+HIT_LINE = "• {mention} - {title} {emoji}, счет: {score}"
+JACKPOT_FREE = (
+    "🎉 <b>ДЖЕКПОТ!</b> 🎉\n\n"
+    "Поздравляем, {mention}! 🎰\n\n"
+    "💰 <b>ВЫИГРЫШ!</b> 💰\n\n"
+    "Администратор свяжется с вами для получения награды!"
+)
+JACKPOT_ADMIN = (
+    "🎰 <b>ВЫПАЛ ДЖЕКПОТ!</b> 🎰\n\n"
+    "👤 <b>Игрок:</b> {mention}\n"
+    "🆔 ID: <code>{user_id}</code>\n"
+    "📛 Имя: {first_name}\n"
+    "📝 Юзернейм: @{username}\n\n"
+    "💬 <b>Чат:</b> {chat_title}\n"
+    "🔗 <b>Ссылка:</b> {link}\n"
+    "⏰ <b>Время:</b> {time}"
+)
+INVALID_ROLL = (
+    "⚠️ {mention}, это сообщение не учитывается!\n"
+    "Причина: {reason}\n\n"
+    "📌 Отправьте новый 🎰 для участия!"
+)
+FLOOD_WARNING = (
+    "🐢 {mention}, слишком много бросков!\n"
+    "Лишние броски не засчитываются, подождите немного."
+)
+
+# ========== ДИНАМИЧЕСКИЕ ЧАСТИ ==========
+
+PLACE_PREFIXES = ("🥇 ", "🥈 ", "🥉 ")
+
+@lru_cache(maxsize=65536)
+def escape_name(user_id: int, name: str) -> str:
+    """HTML-экранирование имени; кэш по (user_id, имя), переименование дает новый ключ"""
+    return html.escape(name)
+
+def display_name(user_id: int, names: Dict[int, str]) -> str:
+    """Возвращает экранированное имя игрока или ID, если имя неизвестно"""
+    name = names.get(user_id)
+    return escape_name(user_id, name) if name else f"ID{user_id}"
+
+def render_leaderboard_rows(rows: Sequence[Tuple[int, int]], names: Dict[int, str],
+                            start: int = 1, emoji: str = "🎰", medals: bool = True,
+                            show_ids: bool = False) -> List[str]:
+    """Строки рейтинга; место start соответствует rows[0]"""
+    get_name = names.get
+    escape = escape_name
+    
+    if show_ids:
+        rendered = [
+            f"{place}. {escape(user_id, name) if (name := get_name(user_id)) else f'ID{user_id}'}"
+            f" (ID: <code>{user_id}</code>): {score} {emoji}"
+            for place, (user_id, score) in enumerate(rows, start)
+        ]
+    else:
+        rendered = [
+            f"{place}. {escape(user_id, name) if (name := get_name(user_id)) else f'ID{user_id}'}: {score} {emoji}"
+            for place, (user_id, score) in enumerate(rows, start)
+        ]
+    
+    # Медали только у первых трех мест - правим их отдельно, не усложняя общий цикл
+    if medals:
+        for index in range(max(0, 1 - start), min(len(rendered), 4 - start)):
+            place = start + index
+            user_id, score = rows[index]
+            name = display_name(user_id, names)
+            if place == 1:
+                name = f"<b>{name}</b>"
+            rendered[index] = f"{PLACE_PREFIXES[place - 1]}{name}: {score} {emoji}"
+    
+    return rendered
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> List[str]:
+    """Режет текст на сообщения не длиннее limit (в UTF-16), только по переводам строк
+
+    Текст кодируется в UTF-16 один раз, границы ищутся поиском по байтам.
+    Длина считается по исходному HTML, то есть с запасом относительно видимого текста.
+    """
+    data = text.encode('utf-16-le')
+    if len(data) <= limit * 2:
+        return [text]
+    
+    chunks: List[str] = []
+    start = 0
+    window = limit * 2
+    while len(data) - start > window:
+        end = start + window
+        cut = data.rfind(b'\n\x00', start, end)
+        # Совпадение должно стоять на границе символа (четное смещение)
+        while cut > start and (cut - start) % 2:
+            cut = data.rfind(b'\n\x00', start, cut + 1)
+        
+        if cut <= start:
+            # Строка длиннее лимита - режем по символу, не разрывая суррогатную пару
+            cut = end
+            if 0xD8 <= data[cut - 1] <= 0xDB:
+                cut -= 2
+            chunks.append(data[start:cut].decode('utf-16-le'))
+            start = cut
+        else:
+            chunks.append(data[start:cut].decode('utf-16-le'))
+            start = cut + 2
+    
+    chunks.append(data[start:].decode('utf-16-le'))
+    return chunks
+
+def chunk_rows(rows: Iterable[str], header: str = "", footer: str = "",
+               limit: int = MESSAGE_LIMIT) -> List[str]:
+    """Собирает заголовок, строки и подвал и делит на сообщения по границам строк"""
+    parts = [header] if header else []
+    parts.extend(rows)
+    if footer:
+        parts.append("\n" + footer)
+    return split_message("\n".join(parts), limit)
+
+def render_leaderboard(rows: Sequence[Tuple[int, int]], names: Dict[int, str], header: str = "",
+                       footer: str = "", limit: Optional[int] = None, **row_options) -> List[str]:
+    """Рейтинг целиком: заголовок, строки (топ limit) и подвал, разбитые на сообщения"""
+    shown = rows if limit is None else rows[:limit]
+    lines = render_leaderboard_rows(shown, names, **row_options)
+    if limit is not None and len(rows) > limit:
+        lines.append("\n" + MORE_PLAYERS.format(count=len(rows) - limit))
+    return chunk_rows(lines, header=header, footer=footer)